@@ -1,11 +1,18 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
 import os
 import pickle
 import threading
 import time
 from datetime import datetime
-from automation_script import run_automation, start_manual_login, save_cookies_and_run, running_tasks
+from automation_script import run_automation, merge_shard_results, session_names, start_manual_login, save_login_cookies, REMOVE_MEMBER_URL, DEFAULT_WORKERS, BrowserEngine, driver_pool
+from task_state import running_tasks, register_task, update_task, log_task_message, finish_task, task_state, wait_for_task_update, FINAL_STATUSES
+from http_engine import HttpEngine
+import planner
+import log_store
+import metrics
+import session_health
+from job_queue import JobQueue, JobConflict
 import json
 
 app = Flask(__name__)
@@ -13,7 +20,177 @@ CORS(app)
 
 # Ensure directories exist
 os.makedirs('cookies', exist_ok=True)
-os.makedirs('logs', exist_ok=True)
+os.makedirs(log_store.LOG_DIR, exist_ok=True)
+
+# Removal engines selectable per run via the 'engine' request field
+ENGINES = {
+    'browser': BrowserEngine(),
+    'http': HttpEngine()
+}
+
+def get_engine(data):
+    name = data.get('engine', 'browser')
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}'. Expected one of: {', '.join(ENGINES)}")
+    return ENGINES[name]
+
+def run_job(job, control):
+    """Scheduler callback: run one queued job and mirror it into the task progress store"""
+    job_id = job['job_id']
+    if job_id in running_tasks:
+        update_task(job_id, status='running', progress=5)
+    else:
+        register_task(job_id, 'running', progress=5, current_member=None, current_family=None,
+                      parent_id=job['parent_id'], shard=shard_label(job), logs=['♻️ Job picked up by the scheduler'])
+    if job['parent_id']:
+        log_task_message(job['parent_id'], f"▶️ Sub-job {job_id} started (rows {job['start_row']}-{job['end_row']})")
+    log_task_message(job_id, '⚡ Automation sequence started')
+    
+    try:
+        result = run_automation(job['cookie_name'], job['start_row'], job['end_row'], job_id,
+                                job['workers'], ENGINES[job['engine']], job['resume'], control)
+    except Exception as e:
+        finish_task(job_id, 'failed', error=str(e), progress=0, logs=[f'❌ Error: {str(e)}'])
+        return 'failed', None, str(e)
+    
+    if result['stopped'] == 'session_expired':
+        # Wait for a fresh login; saving new cookies for this session resumes the job
+        update_task(job_id, status='paused', result=result, reauth_required=True)
+        log_task_message(job_id, f'🔐 Session expired with {result["pending_count"]} members left; log in again to resume')
+        if job['parent_id']:
+            log_task_message(job['parent_id'], f"🔐 Sub-job {job_id} paused: session expired")
+        return 'paused', result, 'Session expired; log in again to resume'
+    
+    if result['stopped'] == 'pause':
+        update_task(job_id, status='paused', result=result)
+        log_task_message(job_id, f'⏸️ Job paused with {result["pending_count"]} members left')
+        return 'paused', result, None
+    
+    status = 'cancelled' if result['stopped'] else 'completed'
+    if job['parent_id']:
+        log_task_message(job['parent_id'], f"{'✅' if status == 'completed' else '⏹️'} Sub-job {job_id} {status}: "
+                                           f"{result['success_count']} removed, {result['fail_count']} failed")
+    finish_task(job_id, status, result=result, progress=100, logs=[
+        '🎉 Automation completed successfully!' if status == 'completed' else '⏹️ Automation cancelled',
+        f'📊 Total processed: {result["total_processed"]}',
+        f'✅ Successful: {result["success_count"]}',
+        f'⚠️ Failed: {result["fail_count"]}'
+    ])
+    return status, result, None
+
+def update_parent_task(parent, children):
+    """Mirror a sharded job's status into its task; consolidate the sub-job logs once it has finished"""
+    parent_id = parent['job_id']
+    ensure_task(parent)
+    if parent['status'] not in FINAL_STATUSES:
+        update_task(parent_id, status=parent['status'],
+                    reauth_required=any(child['status'] == 'paused' and needs_login(child) for child in children))
+        return None
+    
+    result = merge_shard_results(parent['start_row'], parent['end_row'],
+                                 [child['result'] for child in children if child['result']])
+    finish_task(parent_id, parent['status'], result=result, progress=100, logs=[
+        f"🧩 {len(children)} sub-jobs finished; logs consolidated into one success and one failure file",
+        f'📊 Total processed: {result["total_processed"]}',
+        f'✅ Successful: {result["success_count"]}',
+        f'⚠️ Failed: {result["fail_count"]}'
+    ])
+    return result
+
+jobs = JobQueue(run_job, on_parent_update=update_parent_task)
+
+def needs_login(job):
+    """True for a job paused because its session expired"""
+    return bool(job['result']) and job['result'].get('stopped') == 'session_expired'
+
+def resume_after_login(cookie_name):
+    """Requeue every job of ``cookie_name`` that paused on an expired session; return how many"""
+    resumed = 0
+    for job in jobs.list_jobs(status='paused', limit=1000):
+        if cookie_name not in session_names(job['cookie_name']) or not needs_login(job):
+            continue
+        jobs.resume(job['job_id'])
+        ensure_task(job)
+        update_task(job['job_id'], status='queued', reauth_required=False)
+        log_task_message(job['job_id'], '🔓 Session renewed; job queued again')
+        if job['parent_id']:
+            update_task(job['parent_id'], reauth_required=False)
+        resumed += 1
+    return resumed
+
+def saved_sessions():
+    """Names of every saved session in cookies/"""
+    return sorted(filename[:-len('.pkl')] for filename in os.listdir('cookies') if filename.endswith('.pkl'))
+
+def healthy_sessions(names):
+    """Split session names into (usable, expired); an unreachable portal is not treated as expired"""
+    usable, expired = [], []
+    for name in names:
+        alive = False
+        if os.path.exists(f"cookies/{name}.pkl"):
+            alive, _ = session_health.check_cookie(name, REMOVE_MEMBER_URL)
+        (usable if alive is not False else expired).append(name)
+    return usable, expired
+
+def shard_label(job):
+    """Short console prefix of a sub-job, e.g. 'S2'"""
+    return job['job_id'].rsplit('_', 1)[-1].upper() if job['parent_id'] else None
+
+def ensure_task(job):
+    """Make a job visible to the progress endpoints (e.g. after a restart)"""
+    if job['job_id'] not in running_tasks:
+        register_task(job['job_id'], job['status'], progress=100 if job['status'] == 'completed' else 0,
+                      current_member=None, current_family=None,
+                      result=job['result'], error=job['error'], parent_id=job['parent_id'], shard=shard_label(job),
+                      shards=[child['job_id'] for child in jobs.children(job['job_id'])] if job['shards'] else None)
+
+def submit_job(cookie_name, start_row, end_row, workers, engine_name, resume, logs, shard_rows=planner.SHARD_ROWS):
+    """Queue a run (starting the scheduler if needed) and describe the outcome as a JSON response
+
+    Ranges longer than ``shard_rows`` are split into family-aligned sub-jobs
+    whose progress rolls up into the returned task.
+    """
+    jobs.start()
+    job_id = f"{cookie_name.replace(',', '+')}_{start_row}_{end_row}_{int(time.time())}"
+    ranges = planner.shard_range(start_row, end_row, shard_rows)
+    try:
+        if len(ranges) > 1:
+            job, outcome = jobs.submit_sharded(job_id, cookie_name, start_row, end_row, workers, engine_name, resume, ranges)
+        else:
+            job, outcome = jobs.submit(job_id, cookie_name, start_row, end_row, workers, engine_name, resume)
+    except JobConflict as e:
+        return jsonify({'status': 'rejected', 'message': str(e), 'job': e.job}), 409
+    
+    if outcome == 'queued' and job['shards']:
+        children = jobs.children(job['job_id'])
+        # The scheduler may already have started some of them and registered their tasks
+        for child in children:
+            ensure_task(child)
+        ensure_task(job)
+        for message in logs + [f"🧩 Split into {len(children)} sub-jobs: " +
+                               ", ".join(f"{child['start_row']}-{child['end_row']}" for child in children)]:
+            log_task_message(job['job_id'], message)
+        message = f"Automation queued as {len(children)} sub-jobs"
+    elif outcome == 'queued':
+        ensure_task(job)
+        for message in logs:
+            log_task_message(job['job_id'], message)
+        message = 'Automation queued'
+    elif outcome == 'merged':
+        ensure_task(job)
+        log_task_message(job['job_id'], f'🔗 Rows {start_row}-{end_row} merged into this job')
+        message = f"Merged into queued job {job['job_id']} (rows {job['start_row']}-{job['end_row']})"
+    else:
+        ensure_task(job)
+        message = f"Rows already covered by job {job['job_id']} ({job['status']})"
+    
+    return jsonify({
+        'status': 'started',
+        'task_id': job['job_id'],
+        'job_status': job['status'],
+        'outcome': outcome,
+        'message': message
+    })
 
 @app.route('/api/run', methods=['POST'])
 def run_automation_endpoint():
@@ -21,61 +198,37 @@ def run_automation_endpoint():
         data = request.json
         start_row = int(data['start_row'])
         end_row = int(data['end_row'])
-        cookie_name = data['cookie_name']
+        # One session, a list ("cookie_names" or "a,b"), or "all" for every healthy saved session
+        requested = session_names(data.get('cookie_names') or data['cookie_name'])
+        use_all = requested == ['all']
+        if use_all:
+            requested = saved_sessions()
+        workers = int(data.get('workers', DEFAULT_WORKERS))
+        engine = get_engine(data)
+        resume = bool(data.get('resume', False))
+        shard_rows = int(data.get('shard_rows', planner.SHARD_ROWS))
         
-        cookie_path = f"cookies/{cookie_name}.pkl"
-        
-        # Check if cookie exists
-        if os.path.exists(cookie_path):
-            # Run automation in background thread
-            task_id = f"{cookie_name}_{start_row}_{end_row}_{int(time.time())}"
-            
-            def run_task():
-                try:
-                    running_tasks[task_id] = {
-                        'status': 'initializing',
-                        'start_time': datetime.now().isoformat(),
-                        'progress': 0,
-                        'current_member': None,
-                        'current_family': None,
-                        'console_logs': ['🚀 System initialized', '🔐 Loading session cookies...']
-                    }
-                    
-                    # Update status to running
-                    running_tasks[task_id]['status'] = 'running'
-                    running_tasks[task_id]['progress'] = 5
-                    running_tasks[task_id]['console_logs'].append('⚡ Automation sequence started')
-                    
-                    result = run_automation(cookie_name, start_row, end_row, task_id)
-                    
-                    running_tasks[task_id]['status'] = 'completed'
-                    running_tasks[task_id]['end_time'] = datetime.now().isoformat()
-                    running_tasks[task_id]['result'] = result
-                    running_tasks[task_id]['progress'] = 100
-                    running_tasks[task_id]['console_logs'].append('🎉 Automation completed successfully!')
-                    running_tasks[task_id]['console_logs'].append(f'📊 Total processed: {result["total_processed"]}')
-                    running_tasks[task_id]['console_logs'].append(f'✅ Successful: {result["success_count"]}')
-                    running_tasks[task_id]['console_logs'].append(f'⚠️ Failed: {result["fail_count"]}')
-                    
-                except Exception as e:
-                    running_tasks[task_id]['status'] = 'failed'
-                    running_tasks[task_id]['end_time'] = datetime.now().isoformat()
-                    running_tasks[task_id]['error'] = str(e)
-                    running_tasks[task_id]['progress'] = 0
-                    running_tasks[task_id]['console_logs'].append(f'❌ Error: {str(e)}')
-            
-            thread = threading.Thread(target=run_task)
-            thread.start()
-            
-            return jsonify({
-                'status': 'started',
-                'task_id': task_id,
-                'message': 'Automation started successfully'
-            })
+        # Check each cookie exists and still logs in; expired ones are left out of a multi-session run
+        usable, expired = healthy_sessions(requested)
+        if usable:
+            logs = ['🚀 System initialized']
+            if len(usable) > 1:
+                logs.append(f"🔑 Spreading the run over {len(usable)} sessions: {', '.join(usable)}")
+            if expired:
+                logs.append(f"⚠️ Skipping expired or missing sessions: {', '.join(expired)}")
+            # Queue the run; the scheduler starts it when its sessions have a free slot
+            return submit_job(','.join(usable), start_row, end_row, workers, engine.name, resume,
+                              logs=logs + ['🗂️ Job queued, waiting for a free slot...'],
+                              shard_rows=shard_rows)
+        elif use_all:
+            return jsonify({'status': 'error', 'message': 'No healthy saved sessions. Log in with a session name first.'}), 400
         else:
+            cookie_name = expired[0]
             return jsonify({
                 'status': 'login_required',
-                'message': 'Session not found. Manual authentication required.',
+                'message': 'Session expired. Manual authentication required.' if os.path.exists(f"cookies/{cookie_name}.pkl")
+                           else 'Session not found. Manual authentication required.',
+                'cookie_name': cookie_name,
                 'login_url': f'/api/login?cookie_name={cookie_name}&start_row={start_row}&end_row={end_row}'
             })
             
@@ -105,63 +258,116 @@ def save_cookies():
         cookie_name = data['cookie_name']
         start_row = int(data['start_row'])
         end_row = int(data['end_row'])
+        workers = int(data.get('workers', DEFAULT_WORKERS))
+        engine = get_engine(data)
+        resume = bool(data.get('resume', False))
+        shard_rows = int(data.get('shard_rows', planner.SHARD_ROWS))
         
-        task_id = f"{cookie_name}_{start_row}_{end_row}_{int(time.time())}"
-        
-        def run_task():
-            try:
-                running_tasks[task_id] = {
-                    'status': 'saving_cookies',
-                    'start_time': datetime.now().isoformat(),
-                    'progress': 5,
-                    'console_logs': ['💾 Saving authentication session...']
-                }
-                
-                result = save_cookies_and_run(cookie_name, start_row, end_row, task_id)
-                
-                running_tasks[task_id]['status'] = 'completed'
-                running_tasks[task_id]['end_time'] = datetime.now().isoformat()
-                running_tasks[task_id]['result'] = result
-                running_tasks[task_id]['progress'] = 100
-                running_tasks[task_id]['console_logs'].append('✅ Session saved successfully')
-                running_tasks[task_id]['console_logs'].append('🎉 Automation completed')
-                running_tasks[task_id]['console_logs'].append(f'📊 Total processed: {result["total_processed"]}')
-                running_tasks[task_id]['console_logs'].append(f'✅ Successful: {result["success_count"]}')
-                running_tasks[task_id]['console_logs'].append(f'⚠️ Failed: {result["fail_count"]}')
-                
-            except Exception as e:
-                running_tasks[task_id]['status'] = 'failed'
-                running_tasks[task_id]['end_time'] = datetime.now().isoformat()
-                running_tasks[task_id]['error'] = str(e)
-                running_tasks[task_id]['progress'] = 0
-                running_tasks[task_id]['console_logs'].append(f'❌ Error: {str(e)}')
-        
-        thread = threading.Thread(target=run_task)
-        thread.start()
+        save_login_cookies(cookie_name)
+        resume_after_login(cookie_name)
         
-        return jsonify({
-            'status': 'started',
-            'task_id': task_id,
-            'message': 'Session saved and automation started'
-        })
+        return submit_job(cookie_name, start_row, end_row, workers, engine.name, resume,
+                          logs=['✅ Session saved successfully', '🗂️ Job queued, waiting for a free slot...'],
+                          shard_rows=shard_rows)
         
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/jobs')
+def list_jobs():
+    return jsonify(jobs.list_jobs(status=request.args.get('status'), limit=request.args.get('limit', 100, type=int)))
+
+@app.route('/api/jobs/<job_id>/<action>', methods=['POST'])
+def control_job(job_id, action):
+    """Cancel or pause a job (running jobs stop after their current member) or resume a paused one"""
+    if action not in ('cancel', 'pause', 'resume'):
+        return jsonify({'status': 'error', 'message': f'Unknown action {action}'}), 400
+    
+    job = getattr(jobs, action)(job_id)
+    if job is None:
+        return jsonify({'status': 'not_found'}), 404
+    
+    # A sharded job passes the action on to its sub-jobs
+    for target in [job] + (jobs.children(job_id) if job['shards'] else []):
+        ensure_task(target)
+        task = running_tasks.get(target['job_id'], {})
+        if task.get('status') in FINAL_STATUSES:
+            continue
+        if target['status'] == 'cancelled':
+            finish_task(target['job_id'], 'cancelled', logs=['⏹️ Job cancelled'])
+        elif target['status'] in ('paused', 'queued'):
+            update_task(target['job_id'], status=target['status'])
+        else:
+            log_task_message(target['job_id'], f'⏳ {action.capitalize()} requested; stopping after the current member')
+    return jsonify(job)
+
+# Seconds between keep-alive comments on an idle progress stream
+STREAM_HEARTBEAT = 15
+
 @app.route('/api/task_status/<task_id>')
 def get_task_status(task_id):
-    if task_id in running_tasks:
-        return jsonify(running_tasks[task_id])
-    else:
-        return jsonify({'status': 'not_found'}), 404
+    # Incremental poll when a cursor is given: only records the client has not seen yet
+    state = task_state(task_id, request.args.get('cursor', type=int))
+    if state is not None:
+        return jsonify(state)
+    
+    # Forgotten or from before a restart: answer from the persistent job record
+    job = jobs.get(task_id)
+    if job is not None:
+        return jsonify(job)
+    return jsonify({'status': 'not_found'}), 404
+
+@app.route('/api/task_stream/<task_id>')
+def stream_task_status(task_id):
+    """Server-sent events with new log records and changed task fields only"""
+    if task_id not in running_tasks:
+        job = jobs.get(task_id)
+        if job is None:
+            return jsonify({'status': 'not_found'}), 404
+        ensure_task(job)
+    
+    cursor = request.headers.get('Last-Event-ID', type=int)
+    if cursor is None:
+        cursor = request.args.get('cursor', 0, type=int)
+    
+    def generate(cursor):
+        previous = {}
+        version = None
+        while True:
+            state = task_state(task_id, cursor)
+            if state is None:
+                yield 'event: end\ndata: {"status": "not_found"}\n\n'
+                return
+            
+            records = state.pop('log_records')
+            cursor = state.pop('log_cursor')
+            dropped = state.pop('log_dropped')
+            changes = {key: value for key, value in state.items() if previous.get(key) != value}
+            previous = state
+            
+            if records or changes:
+                payload = json.dumps({'cursor': cursor, 'records': records, 'dropped': dropped, 'changes': changes})
+                yield f'id: {cursor}\nevent: progress\ndata: {payload}\n\n'
+            
+            if state.get('status') in FINAL_STATUSES:
+                yield f'event: end\ndata: {json.dumps({"status": state["status"]})}\n\n'
+                return
+            
+            new_version = wait_for_task_update(version, STREAM_HEARTBEAT)
+            if new_version == version:
+                yield ': keep-alive\n\n'
+            version = new_version
+    
+    return Response(stream_with_context(generate(cursor)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/logs')
 def list_logs():
     try:
         log_files = []
-        for filename in os.listdir('logs'):
+        for filename in os.listdir(log_store.LOG_DIR):
             if filename.endswith('.csv'):
-                filepath = os.path.join('logs', filename)
+                filepath = os.path.join(log_store.LOG_DIR, filename)
                 stat = os.stat(filepath)
                 log_files.append({
                     'filename': filename,
@@ -174,10 +380,52 @@ def list_logs():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/logs/query')
+def query_logs():
+    """Journal rows filtered by member, family, run, status, error class and time, one page at a time"""
+    try:
+        log_store.sync_log_files()
+        page = max(1, int(request.args.get('page', 1)))
+        page_size = min(500, max(1, int(request.args.get('page_size', 100))))
+        rows, total = log_store.query_results(
+            member=request.args.get('member'),
+            family=request.args.get('family'),
+            run_id=request.args.get('run'),
+            status=request.args.get('status'),
+            error_class=request.args.get('error_class'),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            limit=page_size,
+            offset=(page - 1) * page_size
+        )
+        return jsonify({
+            'results': rows,
+            'total': total,
+            'page': page,
+            'page_size': page_size
+        })
+    except ValueError as e:
+        return jsonify({'error': f'Invalid paging parameter: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/logs/aggregates')
+def log_aggregates():
+    """Success/failure counts by error class and by run, optionally for a date range"""
+    try:
+        log_store.sync_log_files()
+        return jsonify(log_store.aggregates(
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            run_id=request.args.get('run')
+        ))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/logs/<filename>')
 def download_log(filename):
     try:
-        filepath = os.path.join('logs', filename)
+        filepath = os.path.join(log_store.LOG_DIR, filename)
         if os.path.exists(filepath):
             return send_file(filepath, as_attachment=True)
         else:
@@ -205,5 +453,33 @@ def list_cookies():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/browsers')
+def browser_pool_status():
+    return jsonify(driver_pool.stats())
+
+@app.route('/api/metrics')
+def prometheus_metrics():
+    """Step latency histograms and member counters in the Prometheus text format"""
+    pool = driver_pool.stats()
+    running = sum(1 for task in list(running_tasks.values()) if task.get('status') not in FINAL_STATUSES)
+    body = metrics.render({
+        'automation_tasks_running': ('Automation tasks not yet finished', running),
+        'automation_open_browsers': ('Chrome instances alive in the browser pool', pool['open_browsers']),
+        'automation_max_browsers': ('Browser pool capacity', pool['max_browsers'])
+    })
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+def warm_task_plan():
+    """Build (or load) the task plan and removed-member index in the background so the first run starts at once"""
+    try:
+        planner.load_plan()
+        log_store.sync_log_files()
+    except Exception as e:
+        print(f"⚠️ Task plan not prepared: {e}")
+
 if __name__ == '__main__':
+    # Under the debug reloader only the serving child process runs background work
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        threading.Thread(target=warm_task_plan, daemon=True).start()
+        jobs.start()
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -1,313 +1,752 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
-import pandas as pd
+import csv
 import time
 import pickle
 import os
+import queue
+import threading
 from datetime import datetime
+from driver_pool import DriverPool
+import log_store
+import planner
+import retry
+import metrics
+import session_health
+import rate_controller
+from results_writer import ResultsWriter, point_latest, write_binary_copy, EXTRA_FORMATS
+from job_queue import JobControl
+from waits import step_latency
+from remove_member_page import RemoveMemberPage, LOGIN_URL, REMOVE_MEMBER_URL, REUSE_FORM
+import prevalidation
+from task_state import update_task_progress, update_task
+
+# Number of parallel browser workers used when a run does not specify one
+DEFAULT_WORKERS = int(os.environ.get("AUTOMATION_WORKERS", "1"))
+
+# Pause between tasks on one worker; the rate controller adds to it but never goes below it
+TASK_DELAY = float(os.environ.get("AUTOMATION_TASK_DELAY", "0"))
+
+# Automation browsers run headless unless AUTOMATION_HEADLESS=0 (manual login is always visible)
+HEADLESS = os.environ.get("AUTOMATION_HEADLESS", "1") != "0"
+
+# Persistent HTTP cache for automation browsers, one slot directory per live browser
+BROWSER_CACHE_DIR = os.path.abspath(os.environ.get("AUTOMATION_BROWSER_CACHE", "browser_cache"))
+
+# Requests the removal form never needs: images, fonts and analytics/ads hosts
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*hotjar.com*",
+]
+
+_cache_slots = set()
+_cache_slots_lock = threading.Lock()
+
+# Check the removed-member index before every run (AUTOMATION_SKIP_REMOVED=0 re-submits everything)
+SKIP_REMOVED = os.environ.get("AUTOMATION_SKIP_REMOVED", "1") != "0"
+
+# Seconds to wait for the post-delete page before falling back to a fresh navigation
+REUSE_FORM_WAIT = float(os.environ.get("AUTOMATION_REUSE_FORM_WAIT", "3"))
+
+# Look every member up over HTTP before the delete pass and leave out the ones with nothing to remove
+PREVALIDATE = os.environ.get("AUTOMATION_PREVALIDATE", "0") == "1"
 
 # Global driver instance for manual login
 manual_login_driver = None
 
-# Global variable to store running tasks for progress updates
-running_tasks = {}
-
-def update_task_progress(task_id, progress, current_member=None, current_family=None, step_message=None):
-    """Update task progress with detailed step information"""
-    if task_id in running_tasks:
-        running_tasks[task_id]['progress'] = progress
-        if current_member:
-            running_tasks[task_id]['current_member'] = current_member
-        if current_family:
-            running_tasks[task_id]['current_family'] = current_family
-        if step_message:
-            if 'console_logs' not in running_tasks[task_id]:
-                running_tasks[task_id]['console_logs'] = []
-            running_tasks[task_id]['console_logs'].append(step_message)
-            print(f"📝 {step_message}")
-
-def run_automation(cookie_name, start_row, end_row, task_id=None):
-    """Main automation function with detailed logging and improved timeout handling"""
+def _claim_cache_slot():
+    with _cache_slots_lock:
+        slot = 0
+        while slot in _cache_slots:
+            slot += 1
+        _cache_slots.add(slot)
+        return slot
+
+def _free_cache_slot(slot):
+    with _cache_slots_lock:
+        _cache_slots.discard(slot)
+
+def create_driver():
+    """Launch a lean Chrome instance configured for automation runs
+
+    Headless, no extensions or GPU, images/fonts/analytics blocked through
+    CDP, and a disk cache that survives restarts. Each live browser gets its
+    own cache directory because Chrome cannot share one between processes.
+    """
+    slot = _claim_cache_slot()
+    options = Options()
+    if HEADLESS:
+        options.add_argument("--headless=new")
+    options.add_argument("--window-size=1366,900")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--disable-default-apps")
+    options.add_argument("--no-first-run")
+    options.add_argument("--mute-audio")
+    options.add_argument(f"--disk-cache-dir={os.path.join(BROWSER_CACHE_DIR, str(slot))}")
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    # The waits look for the form controls themselves, so don't block on late subresources
+    options.page_load_strategy = "eager"
+
     try:
-        update_task_progress(task_id, 5, step_message="🔍 Loading CSV data file...")
-        
-        # Load data
-        data = pd.read_csv("Pending E-kyc.csv")
-        data.columns = [col.strip().lower() for col in data.columns]
-        
-        update_task_progress(task_id, 10, step_message=f"✅ CSV loaded successfully. Total rows: {len(data)}")
-        
-        # Set row range
-        range_df = data.iloc[start_row:end_row].copy()
-        
-        if "memberid" not in range_df.columns or "familyid" not in range_df.columns:
-            raise ValueError("Missing 'memberid' or 'familyid' column")
-        
-        update_task_progress(task_id, 15, step_message=f"📊 Processing rows {start_row} to {end_row} ({len(range_df)} records)")
-        
-        # Group members by FamilyID
-        family_groups = range_df.groupby('familyid')['memberid'].apply(list).to_dict()
-        update_task_progress(task_id, 20, step_message=f"🔍 Found {len(family_groups)} families with members")
-        
-        # Prepare task list
-        tasks = []
-        for fam_id, members in family_groups.items():
-            for i in range(len(members)):
-                duplicate = confirm = str(members[i])
-                if i < len(members) - 1:
-                    original = str(members[i + 1])
-                elif i > 0:
-                    original = str(members[i - 1])
-                else:
-                    continue
-                tasks.append((duplicate, confirm, original, fam_id))
-        
-        update_task_progress(task_id, 25, step_message=f"📋 Generated {len(tasks)} automation tasks")
-        
-        # Setup Chrome
-        update_task_progress(task_id, 30, step_message="🌐 Initializing Chrome browser...")
-        options = Options()
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--start-maximized")
-        
         driver = webdriver.Chrome(options=options)
-        wait = WebDriverWait(driver, 15)
-        
+    except Exception:
+        _free_cache_slot(slot)
+        raise
+
+    quit_driver = driver.quit
+    def quit():
         try:
-            # Load cookies
-            update_task_progress(task_id, 35, step_message="🔐 Loading authentication session...")
-            driver.get("https://spr.samagra.gov.in/Login/Public/sLogin.aspx")
-            cookie_path = f"cookies/{cookie_name}.pkl"
-            
-            if os.path.exists(cookie_path):
-                with open(cookie_path, "rb") as f:
-                    for cookie in pickle.load(f):
-                        driver.add_cookie(cookie)
-                update_task_progress(task_id, 40, step_message="✅ Authentication session loaded successfully")
+            quit_driver()
+        finally:
+            _free_cache_slot(slot)
+    driver.quit = quit
+
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    except Exception as e:
+        print(f"⚠️ Resource blocking unavailable: {e}")
+    return driver
+
+def load_session_cookies(driver, cookie_name):
+    """Open the login page and attach the saved session cookies to the driver"""
+    driver.get(LOGIN_URL)
+    cookie_path = f"cookies/{cookie_name}.pkl"
+
+    if not os.path.exists(cookie_path):
+        raise Exception("Cookie file not found")
+
+    with open(cookie_path, "rb") as f:
+        for cookie in pickle.load(f):
+            driver.add_cookie(cookie)
+
+def open_browser(cookie_name):
+    """Launch a Chrome instance with the saved session already loaded"""
+    driver = create_driver()
+    try:
+        load_session_cookies(driver, cookie_name)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+# Warm, authenticated browsers shared by every run in this process
+driver_pool = DriverPool(open_browser, load_session_cookies).register_shutdown()
+
+def remove_member(driver, task_id, dup, conf, orig, fam, base_progress, prefix=""):
+    """Run the removal form for a single member and return its log record
+
+    The form is driven through ``RemoveMemberPage``, one browser round-trip
+    per form stage, starting from the previous member's post-delete form
+    when that is blank (``REUSE_FORM``). Waits are sized from the latencies observed so far (see
+    ``waits``) and a lookup the portal answers with 'not found' fails at once
+    instead of waiting out the timeout.
+    """
+    def failed(error):
+        return False, {
+            "familyid": fam,
+            "memberid": dup,
+            "status": "Failed",
+            "error": error,
+            "timestamp": datetime.now().isoformat(),
+            "original_member": orig
+        }
+
+    lap = metrics.stopwatch("browser", task_id)
+    page = RemoveMemberPage(driver, REMOVE_MEMBER_URL)
+
+    # Reuse the blank form left by the last delete; navigate only when the page state is dirty or unknown
+    if REUSE_FORM and page.blank_form_ready(REUSE_FORM_WAIT):
+        update_task_progress(task_id, base_progress + 1,
+                           step_message=f"{prefix}♻️ Reusing the blank form from the last delete postback", step="reuse_form")
+        lap("reuse_form")
+    else:
+        update_task_progress(task_id, base_progress + 1,
+                           step_message=f"{prefix}🌐 Navigating to member removal page...", step="navigate")
+        started = time.monotonic()
+        page.open(step_latency.timeout("navigate"))
+        step_latency.observe("navigate", time.monotonic() - started)
+        lap("navigate")
+
+    # Fill the three member IDs and click show in one go
+    update_task_progress(task_id, base_progress + 4,
+                       step_message=f"{prefix}📝 Filling member IDs: duplicate {dup}, confirm {conf}, original {orig}", step="fill_ids")
+    started = time.monotonic()
+    show_button = page.search(dup, conf, orig)
+    lap("fill_ids")
+
+    update_task_progress(task_id, base_progress + 10,
+                       step_message=f"{prefix}🔍 Searching for member details in database...", step="show")
+
+    # Wait for the confirm original member ID element, or the portal saying there is nothing to remove
+    timeout = step_latency.timeout("lookup")
+    update_task_progress(task_id, base_progress + 12,
+                       step_message=f"{prefix}⏳ Waiting for confirm original member ID field (timeout: {timeout:.0f}s)...", step="wait_confirm_original")
+
+    try:
+        outcome, found = page.wait_for_lookup(show_button, timeout)
+        step_latency.observe("lookup", time.monotonic() - started)
+        rate_controller.observe(task_id, "lookup", time.monotonic() - started)
+        lap("lookup")
+    except TimeoutException:
+        # Count the timeout as a sample so a slowing portal lengthens later waits
+        step_latency.observe("lookup", timeout)
+        rate_controller.observe(task_id, "lookup", timeout, ok=False)
+        lap("lookup")
+        update_task_progress(task_id, base_progress,
+                           step_message=f"{prefix}⚠️ Timeout: Confirm original member ID field not found within {timeout:.0f} seconds", step="confirm_original_timeout")
+        update_task_progress(task_id, base_progress,
+                           step_message=f"{prefix}🔄 Continuing to next member on a fresh page...", step="confirm_original_timeout")
+        return failed(f"Timeout: Confirm original member ID field not found within {timeout:.0f} seconds")
+
+    if outcome == "not_found":
+        update_task_progress(task_id, base_progress,
+                           step_message=f"{prefix}⚠️ Member not found: {found}", step="not_found")
+        return failed(f"Member not found: {found}")
+
+    update_task_progress(task_id, base_progress + 14,
+                       step_message=f"{prefix}✅ Confirm original member ID field found", step="wait_confirm_original")
+
+    # Confirm original member ID, add the remark and tick the checkbox in one go
+    update_task_progress(task_id, base_progress + 20,
+                       step_message=f"{prefix}📝 Confirming original member ID {orig}, adding remark and checking confirmation...", step="confirm")
+    page.confirm(orig)
+    lap("confirm")
+    started = time.monotonic()
+
+    # Click delete as soon as the portal enables it
+    timeout = step_latency.timeout("delete_ready")
+    update_task_progress(task_id, base_progress + 28,
+                       step_message=f"{prefix}⏳ Waiting for delete button to become clickable (timeout: {timeout:.0f}s)...", step="wait_delete")
+
+    try:
+        page.delete(timeout)
+        step_latency.observe("delete_ready", time.monotonic() - started)
+    except TimeoutException:
+        step_latency.observe("delete_ready", timeout)
+        rate_controller.observe(task_id, "delete", timeout, ok=False)
+        lap("delete")
+        update_task_progress(task_id, base_progress,
+                           step_message=f"{prefix}⚠️ Timeout: Delete button not clickable within {timeout:.0f} seconds", step="delete_timeout")
+        update_task_progress(task_id, base_progress,
+                           step_message=f"{prefix}🔄 Continuing to next member...", step="delete_timeout")
+        return failed(f"Timeout: Delete button not clickable within {timeout:.0f} seconds")
+
+    # Wait for the delete postback to come back before counting the removal or navigating away
+    update_task_progress(task_id, base_progress + 32,
+                       step_message=f"{prefix}🗑️ Delete button clicked, waiting for the portal's answer...", step="delete")
+    clicked = time.monotonic()
+    timeout = step_latency.timeout("delete")
+    try:
+        outcome, message = page.wait_for_delete(timeout)
+        step_latency.observe("delete", time.monotonic() - clicked)
+        rate_controller.observe(task_id, "delete", time.monotonic() - clicked)
+        lap("delete")
+    except TimeoutException:
+        step_latency.observe("delete", timeout)
+        rate_controller.observe(task_id, "delete", timeout, ok=False)
+        lap("delete")
+        update_task_progress(task_id, base_progress,
+                           step_message=f"{prefix}⚠️ Timeout: Delete postback did not complete within {timeout:.0f} seconds", step="delete_timeout")
+        return failed(f"Timeout: Delete postback did not complete within {timeout:.0f} seconds")
+
+    if outcome == "expired":
+        return failed("Session expired: portal redirected to the login page")
+    if outcome == "rejected":
+        update_task_progress(task_id, base_progress,
+                           step_message=f"{prefix}⚠️ Delete rejected: {message or 'portal did not return to the search form'}", step="task_failed")
+        return failed(f"Delete rejected: {message or 'portal did not return to the search form'}")
+
+    update_task_progress(task_id, base_progress + 35,
+                       step_message=f"{prefix}✅ Member {dup} removed successfully from Family {fam}", step="removed")
+
+    return True, {
+        "familyid": fam,
+        "memberid": dup,
+        "status": "Removed",
+        "timestamp": datetime.now().isoformat(),
+        "original_member": orig
+    }
+
+class BrowserEngine:
+    """Removal engine that drives the portal through a real Chrome browser"""
+
+    name = "browser"
+    label = "Chrome browser"
+
+    @property
+    def max_sessions(self):
+        return driver_pool.max_drivers
+
+    def open_session(self, cookie_name):
+        return driver_pool.acquire(cookie_name)
+
+    def remove_member(self, driver, task_id, dup, conf, orig, fam, base_progress, prefix=""):
+        return remove_member(driver, task_id, dup, conf, orig, fam, base_progress, prefix)
+
+    def close_session(self, driver):
+        driver_pool.release(driver)
+
+    def discard_session(self, driver):
+        driver_pool.discard(driver)
+
+def session_names(cookie_name):
+    """Saved session names of a run: one name, a list, or a comma-separated string"""
+    names = cookie_name.split(",") if isinstance(cookie_name, str) else list(cookie_name)
+    return [name.strip() for name in names if name.strip()]
+
+def run_automation(cookie_name, start_row, end_row, task_id=None, workers=None, engine=None, resume=False, control=None,
+                   prevalidate=None):
+    """Main automation function: remove the members of a CSV row range over ``workers`` sessions
+
+    Families run whole and in order on one session, several families at a
+    time; see ``planner``, ``prevalidation``, ``rate_controller`` and
+    ``session_health`` for the steps around the delete pass.
+    """
+    engine = engine or BrowserEngine()
+    control = control or JobControl()
+    prevalidate = PREVALIDATE if prevalidate is None else prevalidate
+    cookie_names = session_names(cookie_name)
+    startRow=start_row+2
+    endRow=end_row
+    run_range = f"{startRow}_{endRow}"
+    run_id = task_id or f"run_{run_range}_{int(time.time())}"
+    try:
+        update_task_progress(task_id, 5, step_message="🔍 Loading CSV task plan...")
+
+        # Families anchored in this range, from the per-file plan (built once per input file)
+        family_tasks, rows_covered, total_rows = planner.plan_range(start_row, end_row)
+
+        update_task_progress(task_id, 10, step_message=f"✅ Task plan ready. Total rows: {total_rows}")
+
+        update_task_progress(task_id, 15, step_message=f"📊 Processing rows {start_row} to {end_row} ({rows_covered} records in whole families)")
+
+        update_task_progress(task_id, 20, step_message=f"🔍 Found {len(family_tasks)} families with members")
+
+        total_tasks = sum(len(tasks) for tasks in family_tasks)
+        update_task_progress(task_id, 25, step_message=f"📋 Generated {total_tasks} automation tasks")
+
+        # Rows stream to the range's logs in batches; every batch is already in the journal
+        success_filename = os.path.join(log_store.LOG_DIR, f"success_removed_{startRow}_{endRow}.csv")
+        fail_filename = os.path.join(log_store.LOG_DIR, f"failed_removal_{startRow}_{endRow}.csv")
+        mark_ingested = lambda path: log_store.mark_ingested([path])
+        success_log = ResultsWriter(success_filename, on_flush=mark_ingested)
+        fail_log = ResultsWriter(fail_filename, on_flush=mark_ingested)
+
+        # Skip members any earlier run or historical success log already removed
+        skipped_count = 0
+        if (resume or SKIP_REMOVED) and family_tasks:
+            added = log_store.sync_log_files()
+            if added:
+                update_task_progress(task_id, 26, step_message=f"🗂️ Indexed {added} removed members from earlier success logs")
+            family_tasks, already_removed = planner.exclude_removed(family_tasks)
+            # Resume carries them into this run's success log; otherwise they are only counted
+            if resume:
+                for entry in already_removed.values():
+                    entry["status"] = "Removed"
+                    success_log.append(entry)
+            skipped_count = len(already_removed)
+            total_tasks -= skipped_count
+            update_task_progress(task_id, 27, step_message=f"⏭️ Skipping {skipped_count} members already removed, {total_tasks} remaining")
+
+        results_lock = threading.Lock()
+
+        # Find expired logins before any worker starts, then keep checking while they run
+        monitors = {name: session_health.SessionMonitor(name, REMOVE_MEMBER_URL) for name in cookie_names}
+        expired_sessions = set()
+
+        def session_alive(name, after_failure=False, force=False):
+            monitor = monitors[name]
+            if monitor.poll(after_failure, force):
+                return True
+            with results_lock:
+                newly_expired = name not in expired_sessions
+                expired_sessions.add(name)
+                all_expired = len(expired_sessions) == len(monitors)
+            if newly_expired and not all_expired:
+                update_task_progress(task_id, 95, step_message=f"🔐 Session {name} expired ({monitor.reason}); its families move to the other sessions", step="session_expired")
+            if all_expired and not control.stop_requested:
+                control.stop('session_expired')
+                update_task_progress(task_id, 95, step_message=f"🔐 Session expired ({monitor.reason}); log in again to resume", step="session_expired")
+            return False
+
+        def live_sessions():
+            return [name for name in cookie_names if name not in expired_sessions]
+
+        if family_tasks:
+            update_task_progress(task_id, 28, step_message=f"🔐 Checking that the saved session{'s are' if len(cookie_names) > 1 else ' is'} still valid...")
+            for name in cookie_names:
+                session_alive(name)
+
+        workers = max(1, min(max(workers or DEFAULT_WORKERS, len(live_sessions())), len(family_tasks) or 1))
+        max_sessions = getattr(engine, "max_sessions", None)
+        if max_sessions:
+            workers = min(workers, max_sessions)
+        completed = [0]
+        started_workers = [0]
+        worker_errors = []
+        deferred = []   # family tails (failed member first) waiting for the retry pass
+        retries_used = {}   # memberid -> retries spent; each member gets its own MAX_RETRIES
+        retried_count = [0]
+
+        def record(ok, entry, pruned=False):
+            log_store.record_result(run_id, run_range, entry)
+            # Pruned members never reached the delete pass, so they stay out of the throughput
+            if pruned:
+                metrics.count_pruned(engine.name, task_id)
             else:
-                raise Exception("Cookie file not found")
-            
-            # Process tasks
-            success_log = []
-            fail_log = []
-            
-            update_task_progress(task_id, 45, step_message="🚀 Starting member removal automation...")
-            
-            for idx, (dup, conf, orig, fam) in enumerate(tasks):
-                try:
-                    base_progress = 45 + (idx / len(tasks)) * 50  # Progress from 45% to 95%
-                    
-                    update_task_progress(task_id, base_progress, current_member=dup, current_family=fam, 
-                                       step_message=f"🔄 [{idx+1}/{len(tasks)}] Starting task for Family {fam}")
-                    
-                    # Navigate to removal page
-                    update_task_progress(task_id, base_progress + 1, 
-                                       step_message=f"🌐 Navigating to member removal page...")
-                    driver.get("https://spr.samagra.gov.in/MemberMgmt/Pages/Remove_Member.aspx")
-
-                    
-                    # Fill duplicate member ID
-                    update_task_progress(task_id, base_progress + 2, 
-                                       step_message=f"📝 Filling duplicate member ID: {dup}")
-                    dup_field = wait.until(EC.presence_of_element_located((By.ID, "ctl00_ctl00_SamagraMain_ContentPlaceHolder1_txtDupSamagraId")))
-                    dup_field.clear()
-                    dup_field.send_keys(dup)
-
-                    update_task_progress(task_id, base_progress + 3, 
-                                       step_message=f"✅ Duplicate member ID entered successfully")
-                    
-                    # Fill confirm member ID
-                    update_task_progress(task_id, base_progress + 4, 
-                                       step_message=f"📝 Filling confirm member ID: {conf}")
-                    driver.find_element(By.ID, "ctl00_ctl00_SamagraMain_ContentPlaceHolder1_txtConfirmSamagraId").clear()
-                    driver.find_element(By.ID, "ctl00_ctl00_SamagraMain_ContentPlaceHolder1_txtConfirmSamagraId").send_keys(conf)
-
-                    update_task_progress(task_id, base_progress + 5, 
-                                       step_message=f"✅ Confirm member ID entered successfully")
-                    
-                    # Fill original member ID
-                    update_task_progress(task_id, base_progress + 6, 
-                                       step_message=f"📝 Filling original member ID: {orig}")
-                    driver.find_element(By.ID, "ctl00_ctl00_SamagraMain_ContentPlaceHolder1_txtOriSamagraId").clear()
-                    driver.find_element(By.ID, "ctl00_ctl00_SamagraMain_ContentPlaceHolder1_txtOriSamagraId").send_keys(orig)
-
-                    update_task_progress(task_id, base_progress + 7, 
-                                       step_message=f"✅ Original member ID entered successfully")
-                    
-                    # Click show button
-                    update_task_progress(task_id, base_progress + 8, 
-                                       step_message=f"🔍 Clicking show button to search for member...")
-                    driver.find_element(By.ID, "ctl00_ctl00_SamagraMain_ContentPlaceHolder1_BtnShow").click()
-
-                    update_task_progress(task_id, base_progress + 10, 
-                                       step_message=f"🔍 Searching for member details in database...")
-                    
-                    # IMPROVED TIMEOUT HANDLING: Wait for confirm original member ID element
-                    update_task_progress(task_id, base_progress + 12, 
-                                       step_message=f"⏳ Waiting for confirm original member ID field (timeout: 15s)...")
-                    
-                    try:
-                        # Wait up to 15 seconds for the confirm original member ID element to appear
-                        confirm_original_field = WebDriverWait(driver, 15).until(
-                            EC.presence_of_element_located((By.ID, "ctl00_ctl00_SamagraMain_ContentPlaceHolder1_txtConfirlOriSamagraId"))
-                        )
-                        update_task_progress(task_id, base_progress + 14, 
-                                           step_message=f"✅ Confirm original member ID field found")
-                        
-                        # Fill confirm original member ID
-                        update_task_progress(task_id, base_progress + 16, 
-                                           step_message=f"📝 Confirming original member ID: {orig}")
-                        confirm_original_field.send_keys(orig)
-
-                        update_task_progress(task_id, base_progress + 18, 
-                                           step_message=f"✅ Original member ID confirmed successfully")
-                        
-                    except TimeoutException:
-                        update_task_progress(task_id, base_progress, 
-                                           step_message=f"⚠️ Timeout: Confirm original member ID field not found within 15 seconds")
-                        update_task_progress(task_id, base_progress, 
-                                           step_message=f"🔄 Reloading page and continuing to next member...")
-                        driver.refresh()
-                        fail_log.append({
-                            "familyid": fam, 
-                            "memberid": dup, 
-                            "status": "Failed", 
-                            "error": "Timeout: Confirm original member ID field not found within 15 seconds",
-                            "timestamp": datetime.now().isoformat(),
-                            "original_member": orig
-                        })
-                        continue
-                    
-                    # Add removal remark
-                    update_task_progress(task_id, base_progress + 20, 
-                                       step_message=f"📝 Adding removal remark...")
-                    driver.find_element(By.ID, "ctl00_ctl00_SamagraMain_ContentPlaceHolder1_txtRemoveRemark").send_keys("okay")
-
-                    update_task_progress(task_id, base_progress + 22, 
-                                       step_message=f"✅ Removal remark added successfully")
-                    
-                    # Check confirmation checkbox
-                    update_task_progress(task_id, base_progress + 24, 
-                                       step_message=f"☑️ Checking confirmation checkbox...")
-                    driver.find_element(By.ID, "ctl00_ctl00_SamagraMain_ContentPlaceHolder1_chkconfirm").click()
-                    update_task_progress(task_id, base_progress + 26, 
-                                       step_message=f"✅ Confirmation checkbox checked")
-                    
-                    # IMPROVED TIMEOUT HANDLING: Wait for delete button to be clickable
-                    update_task_progress(task_id, base_progress + 28, 
-                                       step_message=f"⏳ Waiting for delete button to become clickable (timeout: 15s)...")
-                    
-                    try:
-                        # Wait up to 15 seconds for the delete button to become clickable
-                        delete_button = WebDriverWait(driver, 15).until(
-                            EC.element_to_be_clickable((By.ID, "ctl00_ctl00_SamagraMain_ContentPlaceHolder1_btnDelete"))
-                        )
-                        update_task_progress(task_id, base_progress + 30, 
-                                           step_message=f"✅ Delete button is now clickable")
-                        
-                        # Click delete button
-                        update_task_progress(task_id, base_progress + 32, 
-                                           step_message=f"🗑️ Clicking delete button to remove member...")
-                        delete_button.click()
-                        
-                        update_task_progress(task_id, base_progress + 35, 
-                                           step_message=f"✅ Member {dup} removed successfully from Family {fam}")
-                        
-                        success_log.append({
-                            "familyid": fam, 
-                            "memberid": dup, 
-                            "status": "Removed",
-                            "timestamp": datetime.now().isoformat(),
-                            "original_member": orig
-                        })
-                        
-                    except TimeoutException:
-                        update_task_progress(task_id, base_progress, 
-                                           step_message=f"⚠️ Timeout: Delete button not clickable within 15 seconds")
-                        update_task_progress(task_id, base_progress, 
-                                           step_message=f"🔄 Continuing to next member...")
-                        fail_log.append({
-                            "familyid": fam, 
-                            "memberid": dup, 
-                            "status": "Failed", 
-                            "error": "Timeout: Delete button not clickable within 15 seconds",
-                            "timestamp": datetime.now().isoformat(),
-                            "original_member": orig
-                        })
-                        continue
-                    
-                except Exception as e:
-                    error_msg = str(e)
-                    update_task_progress(task_id, base_progress, 
-                                       step_message=f"⚠️ Failed to remove member {dup} from Family {fam}: {error_msg}")
-                    fail_log.append({
-                        "familyid": fam, 
-                        "memberid": dup, 
-                        "status": "Failed", 
-                        "error": error_msg,
-                        "timestamp": datetime.now().isoformat(),
-                        "original_member": orig
-                    })
-                    continue
-                
-                # Progress update
-                progress = 45 + ((idx + 1) / len(tasks)) * 50
-                update_task_progress(task_id, progress, 
-                                   step_message=f"📊 Progress: {progress:.1f}% ({idx+1}/{len(tasks)} tasks completed)")
-                
-                time.sleep(1)
-            
-            # Save logs with timestamp
-            update_task_progress(task_id, 95, step_message="💾 Saving automation logs...")
-            startRow=start_row+2
-            endRow=end_row
-            success_filename = f"logs/success_removed_{startRow}_{endRow}.csv"
-            fail_filename = f"logs/failed_removal_{startRow}_{endRow}.csv"
-            
-            # Save detailed logs
-            if success_log:
-                pd.DataFrame(success_log).to_csv(success_filename, index=False)
-                update_task_progress(task_id, 97, step_message=f"✅ Success log saved: {success_filename}")
-            
-            if fail_log:
-                pd.DataFrame(fail_log).to_csv(fail_filename, index=False)
-                update_task_progress(task_id, 98, step_message=f"⚠️ Failure log saved: {fail_filename}")
-            
-            # Also save latest logs for quick access
-            pd.DataFrame(success_log).to_csv("logs/success_removed_latest.csv", index=False)
-            pd.DataFrame(fail_log).to_csv("logs/failed_removal_latest.csv", index=False)
-            
-            result = {
-                'success_count': len(success_log),
-                'fail_count': len(fail_log),
-                'success_file': success_filename if success_log else None,
-                'fail_file': fail_filename if fail_log else None,
-                'total_processed': len(tasks)
+                metrics.count_member(entry["status"], engine.name, task_id)
+            with results_lock:
+                (success_log if ok else fail_log).append(entry)
+                completed[0] += 1
+                return completed[0]
+
+        def failure(fam, dup, orig, error):
+            return {
+                "familyid": fam,
+                "memberid": dup,
+                "status": "Failed",
+                "error": error,
+                "timestamp": datetime.now().isoformat(),
+                "original_member": orig
             }
-            
+
+        def worker(worker_no, cookie, family_queue):
+            if len(cookie_names) > 1:
+                prefix = f"[W{worker_no} {cookie}] "
+            else:
+                prefix = f"[W{worker_no}] " if workers > 1 else ""
+
+            # Setup session and load cookies
+            update_task_progress(task_id, 30, step_message=f"{prefix}🌐 Initializing {engine.label}...")
+            update_task_progress(task_id, 35, step_message=f"{prefix}🔐 Loading authentication session...")
+            try:
+                with metrics.span("session_open", engine.name, task_id):
+                    session = engine.open_session(cookie)
+            except Exception as e:
+                worker_errors.append(e)
+                update_task_progress(task_id, 30, step_message=f"{prefix}❌ Session failed to start: {e}")
+                return
+
+            tasks = []
+            try:
+                update_task_progress(task_id, 40, step_message=f"{prefix}✅ Authentication session loaded successfully")
+
+                with results_lock:
+                    started_workers[0] += 1
+
+                while session_alive(cookie) and not control.stop_requested:
+                    try:
+                        tasks = list(family_queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                    while tasks:
+                        if not session_alive(cookie) or control.stop_requested:
+                            # Leave the rest of the family to another session or a resumed run
+                            family_queue.put(tasks)
+                            tasks = []
+                            break
+
+                        dup, conf, orig, fam = tasks[0]
+                        base_progress = 45 + (completed[0] / total_tasks) * 50  # Progress from 45% to 95%
+
+                        update_task_progress(task_id, base_progress, current_member=dup, current_family=fam,
+                                           step_message=f"{prefix}🔄 [{completed[0]+1}/{total_tasks}] Starting task for Family {fam}", step="task_start")
+
+                        try:
+                            with rate.slot(), metrics.span("member", engine.name, task_id):
+                                ok, entry = engine.remove_member(session, task_id, dup, conf, orig, fam, base_progress, prefix)
+                        except Exception as e:
+                            update_task_progress(task_id, base_progress,
+                                               step_message=f"{prefix}⚠️ Failed to remove member {dup} from Family {fam}: {e}", step="task_failed")
+                            ok, entry = False, failure(fam, dup, orig, str(e))
+                        tasks.pop(0)
+
+                        if rate.delay:
+                            with metrics.span("task_delay", engine.name, task_id):
+                                time.sleep(rate.delay)
+
+                        if ok:
+                            done = record(ok, entry)
+                            progress = 45 + (done / total_tasks) * 50
+                            update_task_progress(task_id, progress,
+                                               step_message=f"{prefix}📊 Progress: {progress:.1f}% ({done}/{total_tasks} tasks completed)", step="task_done")
+                            continue
+
+                        error_class = retry.classify(entry.get("error"))
+                        entry["error_class"] = error_class
+
+                        # A dead session (login redirect, lost browser) is checked at once, not at the next interval
+                        if not session_alive(cookie, after_failure=True, force=error_class == retry.SESSION_DEAD):
+                            # The login expired, not the member: leave it for another session or the resumed run
+                            tasks.insert(0, (dup, conf, orig, fam))
+                            continue
+
+                        if retry.is_transient(error_class) and retries_used.get(dup, 0) < retry.MAX_RETRIES:
+                            # Journal the attempt but keep the member out of the fail log until retries run out.
+                            # The rest of its family waits with it, so no later member runs before it.
+                            log_store.record_result(run_id, run_range, dict(entry, status="Retrying"))
+                            with results_lock:
+                                retries_used[dup] = retries_used.get(dup, 0) + 1
+                                deferred.append([(dup, conf, orig, fam)] + tasks)
+                            waiting = f" with {len(tasks)} later family member(s)" if tasks else ""
+                            update_task_progress(task_id, base_progress,
+                                               step_message=f"{prefix}🔁 {error_class}: member {dup} queued for retry{waiting}", step="retry_queued")
+                            tasks = []
+                        else:
+                            record(False, entry)
+
+                        if error_class == retry.SESSION_DEAD:
+                            update_task_progress(task_id, base_progress,
+                                               step_message=f"{prefix}♻️ Session lost, starting a fresh {engine.label} session...", step="session_recycle")
+                            dead, session = session, None
+                            engine.discard_session(dead)
+                            with metrics.span("session_open", engine.name, task_id):
+                                session = engine.open_session(cookie)
+
+            except Exception as e:
+                update_task_progress(task_id, 40, step_message=f"{prefix}❌ Worker stopped: {e}")
+                # Hand the rest of the interrupted family to whoever is still running
+                if tasks:
+                    family_queue.put(tasks)
+
+            finally:
+                if session is not None:
+                    engine.close_session(session)
+                update_task_progress(task_id, 95, step_message=f"{prefix}🔒 {engine.label} session released safely")
+
+        def pass_worker(worker_no, cookie, family_queue):
+            """Run ``worker``; when its session expires, carry on under one still alive"""
+            while True:
+                worker(worker_no, cookie, family_queue)
+                cookies = live_sessions()
+                if cookie in cookies or not cookies or control.stop_requested or family_queue.empty():
+                    return
+                cookie = cookies[worker_no % len(cookies)]
+                update_task_progress(task_id, 95, step_message=f"⚖️ Worker {worker_no} moves to session {cookie}", step="rebalance")
+
+        def run_pass(families):
+            """Work ``families`` off a shared queue; return the families nobody could attempt"""
+            if not families:
+                # Everything was skipped or pruned: don't open a session (or launch Chrome) for nothing
+                return []
+
+            # Queue whole families so pairs inside a family never race each other
+            family_queue = queue.Queue()
+            for tasks in families:
+                family_queue.put(tasks)
+
+            # Deal the workers round-robin over the sessions still alive
+            cookies = live_sessions()
+            pass_workers = min(max(workers, len(cookies)), len(families) or 1)
+            if max_sessions:
+                # More sessions than browsers: the extra sessions sit this pass out
+                pass_workers = min(pass_workers, max_sessions)
+            threads = [threading.Thread(target=pass_worker, args=(n + 1, cookies[n % len(cookies)], family_queue), daemon=True)
+                       for n in range(pass_workers)] if cookies else []
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            leftover = []
+            while not family_queue.empty():
+                leftover.append(family_queue.get_nowait())
+            return leftover
+
+        metrics.start_task(task_id)
+
+        # Pace the workers to what the portal handles; the current setting shows in the task status
+        def pace_changed(pace, reason):
+            update_task(task_id, pace=pace)
+            update_task_progress(task_id, 45 + (completed[0] / total_tasks) * 50 if total_tasks else 95,
+                               step_message=f"🎚️ Portal {pace['latency']:g}s per postback, {pace['error_rate']:.0%} errors: "
+                                            f"{reason}, {pace['workers']}/{pace['max_workers']} workers, {pace['delay']:g}s delay", step="pace")
+
+        rate = rate_controller.RateController(workers, TASK_DELAY, on_change=pace_changed)
+        rate_controller.register(task_id, rate)
+        update_task(task_id, pace=rate.snapshot())
+
+        # Lookup-only pre-check: prune members with nothing to remove before any delete starts
+        pruned_count = 0
+        if prevalidate and family_tasks and live_sessions() and not control.stop_requested:
+            def checked(done, total):
+                if done == total or done % max(1, total // 10) == 0:
+                    update_task_progress(task_id, 30 + (done / total) * 14,
+                                       step_message=f"🔎 Pre-check: {done}/{total} members looked up", step="prevalidate")
+
+            update_task_progress(task_id, 30, step_message=f"🔎 Pre-checking {total_tasks} members with lookups only...")
+            with metrics.span("prevalidate", engine.name, task_id):
+                family_tasks, pruned = prevalidation.check_members(
+                    family_tasks, live_sessions(), on_checked=checked, stopped=lambda: control.stop_requested,
+                    rate=rate, task_id=task_id, max_workers=workers)
+            for (dup, conf, orig, fam), reason in pruned:
+                entry = failure(fam, dup, orig, f"Pre-check: {reason}")
+                entry["error_class"] = retry.NOT_FOUND
+                record(False, entry, pruned=True)
+            pruned_count = len(pruned)
+            update_task_progress(task_id, 44, step_message=f"🔎 Pre-check pruned {len(pruned)} members with nothing to remove; "
+                                                           f"{sum(len(tasks) for tasks in family_tasks)} go to the delete pass")
+
+        update_task_progress(task_id, 45, step_message=f"🚀 Starting member removal automation with {workers} worker(s)...")
+
+        pending = family_tasks
+        attempt = 0
+        pending_count = 0
+        while True:
+            expired_before = len(expired_sessions)
+            leftover = run_pass(pending) if not control.stop_requested else pending
+
+            if attempt == 0 and family_tasks and not started_workers[0] and not control.stop_requested:
+                raise worker_errors[0] if worker_errors else Exception("No worker session could be started")
+
+            if control.stop_requested:
+                # Stopped on request: unreached members and pending retries stay unrecorded
+                pending_count = sum(len(tasks) for tasks in leftover + deferred)
+                update_task_progress(task_id, 95, step_message=f"⏹️ Run stopped ({control.stop_reason}); {pending_count} members not processed")
+                break
+
+            # Sessions expired during the pass while others finished: rebalance onto the survivors
+            if leftover and len(expired_sessions) > expired_before and live_sessions():
+                update_task_progress(task_id, 95, step_message=f"⚖️ Moving {len(leftover)} families to {len(live_sessions())} remaining session(s)", step="rebalance")
+                pending = leftover
+                continue
+
+            # Families left in the queue were never attempted (every worker died)
+            for tasks in leftover:
+                for dup, conf, orig, fam in tasks:
+                    record(False, failure(fam, dup, orig, "Not attempted: all workers stopped"))
+
+            if not deferred:
+                break
+
+            # Retry transient failures as a new pass, each with the rest of its family in order
+            attempt += 1
+            pending = list(deferred)
+            retried_count[0] += len(deferred)
+            # A tail can fail again further along, so passes may outnumber MAX_RETRIES; the backoff stops growing there
+            delay = retry.backoff(min(attempt, retry.MAX_RETRIES))
+            update_task_progress(task_id, 95, step_message=f"🔁 Retrying {len(deferred)} transient failure(s) in {delay:g}s (retry pass {attempt})...")
+            deferred.clear()
+            with metrics.span("retry_backoff", engine.name, task_id):
+                time.sleep(delay)
+
+        # Write the last batches
+        update_task_progress(task_id, 95, step_message="💾 Saving automation logs...")
+        success_file = success_log.close()
+        if success_file:
+            update_task_progress(task_id, 97, step_message=f"✅ Success log saved: {success_file}")
+
+        fail_file = fail_log.close()
+        if fail_file:
+            update_task_progress(task_id, 98, step_message=f"⚠️ Failure log saved: {fail_file}")
+
+        # Point the latest views at this run's logs for quick access
+        point_latest(success_file, os.path.join(log_store.LOG_DIR, "success_removed_latest.csv"))
+        point_latest(fail_file, os.path.join(log_store.LOG_DIR, "failed_removal_latest.csv"))
+
+        result = {
+            'success_count': success_log.count,
+            'fail_count': fail_log.count,
+            'success_file': success_file,
+            'fail_file': fail_file,
+            'total_processed': total_tasks + skipped_count - pending_count,
+            'skipped_count': skipped_count,
+            'workers': workers,
+            'engine': engine.name,
+            'retried_count': retried_count[0],
+            'pruned_count': pruned_count,
+            'pending_count': pending_count,
+            'stopped': control.stop_reason,
+            'pace': rate.snapshot(),
+            'timings': dict(metrics.task_summary(task_id) or {}, wait_timeouts=step_latency.snapshot())
+        }
+
+        if control.stop_reason == 'session_expired':
+            update_task_progress(task_id, 100, step_message="🔐 Automation paused until the session is renewed")
+        elif control.stop_requested:
+            update_task_progress(task_id, 100, step_message=f"⏹️ Automation {'paused' if control.stop_reason == 'pause' else 'cancelled'}")
+        else:
             update_task_progress(task_id, 100, step_message=f"🎉 Automation completed successfully!")
-            update_task_progress(task_id, 100, step_message=f"📊 Final Results - Total: {len(tasks)}, Success: {len(success_log)}, Failed: {len(fail_log)}")
-            
-            return result
-            
-        finally:
-            driver.quit()
-            update_task_progress(task_id, 100, step_message="🔒 Browser session closed safely")
-            
+        update_task_progress(task_id, 100, step_message=f"⏱️ Throughput: {result['timings'].get('members_per_min', 0)} members/min")
+        update_task_progress(task_id, 100, step_message=f"📊 Final Results - Total: {result['total_processed']}, Success: {success_log.count}, Failed: {fail_log.count}")
+
+        return result
+
     except Exception as e:
         update_task_progress(task_id, 0, step_message=f"❌ Automation failed: {e}")
         raise e
 
+    finally:
+        rate_controller.unregister(task_id)
+
+def merge_shard_results(start_row, end_row, results):
+    """Combine the results of a sharded run into one success and one failure file
+
+    ``results`` are the run_automation results of the sub-jobs, in row
+    order. Their per-shard log files are replaced by the consolidated ones.
+    """
+    startRow=start_row+2
+    endRow=end_row
+    
+    merged = {}
+    for key, name, latest in (
+            ('success_file', f"success_removed_{startRow}_{endRow}.csv", "success_removed_latest.csv"),
+            ('fail_file', f"failed_removal_{startRow}_{endRow}.csv", "failed_removal_latest.csv")):
+        filename, latest = os.path.join(log_store.LOG_DIR, name), os.path.join(log_store.LOG_DIR, latest)
+        paths = [result[key] for result in results if result.get(key) and os.path.exists(result[key])]
+        writer = ResultsWriter(filename + ".tmp")
+        for path in paths:
+            with open(path, newline="") as f:
+                for row in csv.DictReader(f):
+                    writer.append(row)
+        merged_file = writer.close(formats=())
+        if merged_file:
+            os.replace(merged_file, filename)
+            log_store.mark_ingested([filename])
+            for fmt in EXTRA_FORMATS:
+                write_binary_copy(filename, fmt)
+        for path in paths:
+            if os.path.abspath(path) != os.path.abspath(filename):
+                os.remove(path)
+                for sidecar in (".parquet", ".feather"):
+                    if os.path.exists(os.path.splitext(path)[0] + sidecar):
+                        os.remove(os.path.splitext(path)[0] + sidecar)
+        merged[key] = filename if merged_file else None
+        point_latest(merged[key], latest)
+    
+    totals = {key: sum(result.get(key, 0) for result in results)
+              for key in ('success_count', 'fail_count', 'total_processed', 'skipped_count',
+                          'retried_count', 'pruned_count', 'pending_count')}
+    return {
+        **totals,
+        **merged,
+        'workers': max((result.get('workers', 0) for result in results), default=0),
+        'engine': results[0].get('engine') if results else None,
+        'shards': len(results),
+        'stopped': None
+    }
+
 def start_manual_login(cookie_name):
     """Start browser for manual login"""
     global manual_login_driver
     
+    # Never leave an earlier, abandoned login window running
+    if manual_login_driver is not None:
+        try:
+            manual_login_driver.quit()
+        except Exception:
+            pass
+        manual_login_driver = None
+    
     options = Options()
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
@@ -315,13 +754,13 @@ def start_manual_login(cookie_name):
     options.add_argument("--start-maximized")
     
     manual_login_driver = webdriver.Chrome(options=options)
-    manual_login_driver.get("https://spr.samagra.gov.in/Login/Public/sLogin.aspx")
+    manual_login_driver.get(LOGIN_URL)
     
     print(f"🔐 Browser opened for manual login. Session will be saved as: {cookie_name}")
     return True
 
-def save_cookies_and_run(cookie_name, start_row, end_row, task_id=None):
-    """Save cookies from manual login and run automation"""
+def save_login_cookies(cookie_name, task_id=None):
+    """Save cookies from the manual login browser, then close it"""
     global manual_login_driver
     
     if manual_login_driver is None:
@@ -336,16 +775,19 @@ def save_cookies_and_run(cookie_name, start_row, end_row, task_id=None):
         
         update_task_progress(task_id, 20, step_message=f"✅ Session cookies saved as {cookie_path}")
         
-        # Close manual login browser
+        # The visible login browser has none of the lean automation profile; runs launch their own
         manual_login_driver.quit()
         manual_login_driver = None
         update_task_progress(task_id, 25, step_message="🔒 Manual login browser closed")
-        
-        # Run automation
-        return run_automation(cookie_name, start_row, end_row, task_id)
+        return cookie_path
         
     except Exception as e:
         if manual_login_driver:
             manual_login_driver.quit()
             manual_login_driver = None
-        raise e
\ No newline at end of file
+        raise e
+
+def save_cookies_and_run(cookie_name, start_row, end_row, task_id=None, workers=None, engine=None, resume=False):
+    """Save cookies from manual login and run automation"""
+    save_login_cookies(cookie_name, task_id)
+    return run_automation(cookie_name, start_row, end_row, task_id, workers, engine, resume)
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""Offline throughput benchmark of run_automation against the mock portal.
+
+Generates a synthetic member file, serves ``mock_portal`` on a free local
+port and runs the automation over growing row counts, reporting members/min
+and memory for each:
+
+    python benchmark.py --rows 100 500 2000 --workers 4 --latency 0.05
+    python benchmark.py --rows 500 --save baseline.json
+    python benchmark.py --rows 500 --baseline baseline.json --tolerance 15
+
+With ``--baseline`` the exit status is 1 when any row count is slower than
+the saved run by more than ``--tolerance`` percent.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def write_members(path, rows, seed=1):
+    """Synthetic input file: families of 2-4 members, IDs unique across the file"""
+    rng = random.Random(seed)
+    member = 100000000
+    family = 20000000
+    with open(path, "w") as f:
+        f.write("familyid,memberid\n")
+        written = 0
+        while written < rows:
+            family += 1
+            for _ in range(min(rng.randint(2, 4), rows - written)):
+                member += 1
+                f.write(f"{family},{member}\n")
+                written += 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark run_automation against the mock portal")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--engine", choices=["http", "browser"], default="http")
+    parser.add_argument("--latency", type=float, default=0.0, help="mock portal latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--not-found-rate", type=float, default=0.0)
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also report the Python heap peak per run (slows the run down)")
+    parser.add_argument("--save", metavar="FILE", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="compare members/min against a saved run")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="allowed slowdown in percent")
+    args = parser.parse_args()
+
+    args.save = args.save and os.path.abspath(args.save)
+    args.baseline = args.baseline and os.path.abspath(args.baseline)
+
+    # Everything the run writes (logs, journal, plan cache, cookies) goes to a scratch directory
+    workdir = tempfile.mkdtemp(prefix="automation_bench_")
+    port = _free_port()
+    data_file = os.path.join(workdir, "members.csv")
+    write_members(data_file, max(args.rows))
+
+    os.environ.update({
+        "SAMAGRA_PORTAL_URL": f"http://127.0.0.1:{port}",
+        "AUTOMATION_DATA_FILE": data_file,
+        "AUTOMATION_DB": os.path.join(workdir, "logs", "automation.db"),
+        "AUTOMATION_PLAN_CACHE": os.path.join(workdir, "cache"),
+        "AUTOMATION_SKIP_REMOVED": "0",
+    })
+    os.chdir(workdir)
+    os.makedirs("logs", exist_ok=True)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    # Imported only now so they pick up the environment above
+    import mock_portal
+    from werkzeug.serving import make_server
+    from automation_script import run_automation, BrowserEngine
+    from http_engine import HttpEngine
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    portal = mock_portal.create_app(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                    not_found_rate=args.not_found_rate, seed=1)
+    server = make_server("127.0.0.1", port, portal, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mock_portal.write_cookie("bench", "127.0.0.1")
+
+    print(f"📂 Scratch directory: {workdir}")
+    print(f"{'rows':>8} {'members':>8} {'seconds':>9} {'members/min':>12} {'peak RSS MB':>12} {'heap MB':>8}")
+
+    results = []
+    try:
+        for rows in args.rows:
+            portal.config["REMOVED"].clear()
+            engine = HttpEngine() if args.engine == "http" else BrowserEngine()
+            if args.trace_memory:
+                tracemalloc.start()
+
+            started = time.perf_counter()
+            result = run_automation("bench", 0, rows, None, workers=args.workers, engine=engine)
+            elapsed = time.perf_counter() - started
+
+            heap_mb = None
+            if args.trace_memory:
+                heap_mb = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+                tracemalloc.stop()
+
+            # Members the pre-check pruned never reached the delete pass
+            members = result["success_count"] + result["fail_count"] - result.get("pruned_count", 0)
+            row = {
+                "rows": rows,
+                "members": members,
+                "seconds": round(elapsed, 2),
+                "members_per_min": round(members / (elapsed / 60), 1) if elapsed else 0,
+                "peak_rss_mb": _peak_rss_mb(),
+                "heap_peak_mb": heap_mb,
+                "failed": result["fail_count"],
+            }
+            results.append(row)
+            print(f"{rows:>8} {members:>8} {row['seconds']:>9} {row['members_per_min']:>12} "
+                  f"{row['peak_rss_mb'] or '-':>12} {heap_mb or '-':>8}")
+    finally:
+        server.shutdown()
+
+    report = {"engine": args.engine, "workers": args.workers, "latency": args.latency, "results": results}
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results saved to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {row["rows"]: row for row in json.load(f)["results"]}
+        regressed = False
+        for row in results:
+            before = baseline.get(row["rows"])
+            if not before or not before["members_per_min"]:
+                continue
+            change = (row["members_per_min"] - before["members_per_min"]) / before["members_per_min"] * 100
+            marker = "❌" if change < -args.tolerance else "✅"
+            regressed |= change < -args.tolerance
+            print(f"{marker} {row['rows']} rows: {before['members_per_min']} → {row['members_per_min']} members/min ({change:+.1f}%)")
+        return 1 if regressed else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
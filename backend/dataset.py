@@ -0,0 +1,48 @@
+import os
+import threading
+
+import pandas as pd
+
+# Input file with the pending members, relative to the backend directory
+DATA_FILE = os.environ.get("AUTOMATION_DATA_FILE", "Pending E-kyc.csv")
+
+# The only columns the automation needs; everything else is never parsed
+ID_COLUMNS = ("familyid", "memberid")
+
+_cache = {}
+_lock = threading.Lock()
+
+def _wanted(column):
+    return column.strip().lower() in ID_COLUMNS
+
+def _read(path, **kwargs):
+    """Parse only the ID columns, as strings, with normalised column names"""
+    data = pd.read_csv(path, usecols=_wanted, dtype=str, **kwargs)
+    data.columns = [col.strip().lower() for col in data.columns]
+    if "memberid" not in data.columns or "familyid" not in data.columns:
+        raise ValueError("Missing 'memberid' or 'familyid' column")
+    return data[list(ID_COLUMNS)]
+
+def file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def load_members(path=DATA_FILE):
+    """Return (familyid, memberid) for the whole file and whether it came from cache
+
+    The parsed frame is kept per path and reused until the file's mtime or
+    size changes, so back-to-back range runs parse the CSV once.
+    """
+    signature = file_signature(path)
+    with _lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == signature:
+            return cached[1], True
+
+        data = _read(path)
+        _cache[path] = (signature, data)
+        return data, False
+
+def read_window(start_row, end_row, path=DATA_FILE):
+    """Parse just rows ``start_row:end_row`` without touching the cache (for one-off scripts)"""
+    return _read(path, skiprows=range(1, start_row + 1), nrows=max(0, end_row - start_row))
\ No newline at end of file
@@ -0,0 +1,205 @@
+import atexit
+import os
+import threading
+import time
+
+# Upper bound on Chrome instances alive in this process (busy + idle)
+MAX_BROWSERS = int(os.environ.get("AUTOMATION_MAX_BROWSERS", "4"))
+
+# Idle browsers are quit after this many seconds without a task
+IDLE_TIMEOUT = float(os.environ.get("AUTOMATION_BROWSER_IDLE_TIMEOUT", "600"))
+
+# How long acquire() waits for a browser slot before giving up
+ACQUIRE_TIMEOUT = float(os.environ.get("AUTOMATION_BROWSER_ACQUIRE_TIMEOUT", "300"))
+
+def _cookie_mtime(cookie_name):
+    try:
+        return os.path.getmtime(f"cookies/{cookie_name}.pkl")
+    except OSError:
+        return None
+
+class DriverPool:
+    """Process-wide pool of warm, authenticated Chrome drivers keyed by cookie name
+
+    ``factory(cookie_name)`` launches a driver with that session loaded and
+    ``refresh(driver, cookie_name)`` re-applies the cookie file to an existing
+    driver when the file changed since the driver was warmed up.
+    """
+
+    def __init__(self, factory, refresh, max_drivers=MAX_BROWSERS, idle_timeout=IDLE_TIMEOUT):
+        self.factory = factory
+        self.refresh = refresh
+        self.max_drivers = max(1, max_drivers)
+        self.idle_timeout = idle_timeout
+        self._idle = {}     # cookie_name -> [(driver, released_at), ...]
+        self._owners = {}   # id(driver) -> (cookie_name, cookie_mtime)
+        self._cond = threading.Condition()
+        self._reaper = None
+
+    def _size(self):
+        return len(self._owners)
+
+    def _forget(self, driver):
+        self._owners.pop(id(driver), None)
+        self._cond.notify_all()
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def is_healthy(self, driver):
+        """Cheap liveness probe: the browser answers a script round-trip"""
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, cookie_name, timeout=ACQUIRE_TIMEOUT):
+        """Return a warm driver for ``cookie_name``, launching one if needed"""
+        deadline = time.time() + timeout
+        # Only pool bookkeeping happens under the lock; probes, refreshes, quits and launches run outside it
+        while True:
+            driver = victim = placeholder = None
+            with self._cond:
+                idle = self._idle.get(cookie_name)
+                if idle:
+                    # Popped from idle it counts as busy, so nobody else takes it while it is probed
+                    driver, _ = idle.pop()
+                else:
+                    if self._size() >= self.max_drivers:
+                        # Make room by retiring an idle browser held for another session
+                        victim = self._retire_oldest_idle()
+                    if self._size() < self.max_drivers:
+                        # Reserve the slot before releasing the lock for the slow launch
+                        placeholder = object()
+                        self._owners[id(placeholder)] = (cookie_name, None)
+                    else:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            raise Exception(f"No browser available: all {self.max_drivers} browsers are busy")
+                        self._cond.wait(remaining)
+
+            if victim is not None:
+                self._quit(victim)
+            if placeholder is not None:
+                break
+            if driver is None:
+                continue
+
+            if not self.is_healthy(driver):
+                self.discard(driver)
+                continue
+            with self._cond:
+                owner, warmed_mtime = self._owners[id(driver)]
+            mtime = _cookie_mtime(cookie_name)
+            if mtime and warmed_mtime and mtime > warmed_mtime:
+                try:
+                    self.refresh(driver, cookie_name)
+                except Exception:
+                    self.discard(driver)
+                    raise
+                with self._cond:
+                    self._owners[id(driver)] = (owner, mtime)
+            return driver
+
+        try:
+            driver = self.factory(cookie_name)
+        except Exception:
+            with self._cond:
+                self._forget(placeholder)
+            raise
+
+        with self._cond:
+            self._owners.pop(id(placeholder), None)
+            self._owners[id(driver)] = (cookie_name, _cookie_mtime(cookie_name))
+        return driver
+
+    def _oldest_idle(self):
+        oldest = None
+        for cookie_name, idle in self._idle.items():
+            if idle and (oldest is None or idle[0][1] < oldest[2]):
+                oldest = (cookie_name, idle[0][0], idle[0][1])
+        if oldest is None:
+            return None
+        self._idle[oldest[0]].pop(0)
+        return oldest[1]
+
+    def release(self, driver):
+        """Hand a driver back; dead drivers are quit instead of pooled"""
+        healthy = self.is_healthy(driver)
+        with self._cond:
+            owner = self._owners.get(id(driver))
+            if owner is None or not healthy:
+                self._forget(driver)
+            else:
+                self._idle.setdefault(owner[0], []).append((driver, time.time()))
+                self._cond.notify_all()
+                self._start_reaper()
+                return
+        self._quit(driver)
+
+    def discard(self, driver):
+        """Drop a driver whose session can no longer be trusted"""
+        with self._cond:
+            self._forget(driver)
+        self._quit(driver)
+
+    def _retire_oldest_idle(self):
+        """Take the longest-idle browser out of the pool (lock held); the caller quits it"""
+        victim = self._oldest_idle()
+        if victim is not None:
+            self._forget(victim)
+        return victim
+
+    def reap(self):
+        """Quit browsers that have been idle longer than ``idle_timeout``"""
+        cutoff = time.time() - self.idle_timeout
+        expired = []
+        with self._cond:
+            for cookie_name, idle in self._idle.items():
+                keep = []
+                for driver, released_at in idle:
+                    (expired if released_at < cutoff else keep).append((driver, released_at))
+                idle[:] = keep
+            for driver, _ in expired:
+                self._forget(driver)
+        for driver, _ in expired:
+            self._quit(driver)
+        return len(expired)
+
+    def _start_reaper(self):
+        if self._reaper is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(max(self.idle_timeout / 4, 5))
+                self.reap()
+
+        self._reaper = threading.Thread(target=loop, daemon=True)
+        self._reaper.start()
+
+    def stats(self):
+        with self._cond:
+            idle = {name: len(drivers) for name, drivers in self._idle.items() if drivers}
+            return {
+                'max_browsers': self.max_drivers,
+                'open_browsers': self._size(),
+                'idle_browsers': idle
+            }
+
+    def shutdown(self):
+        with self._cond:
+            drivers = [driver for idle in self._idle.values() for driver, _ in idle]
+            self._idle.clear()
+            for driver in drivers:
+                self._forget(driver)
+        for driver in drivers:
+            self._quit(driver)
+
+    def register_shutdown(self):
+        atexit.register(self.shutdown)
+        return self
@@ -0,0 +1,303 @@
+import os
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+import rate_controller
+from session_health import bind_saved_cookies
+from waits import not_found_message, label_text
+from remove_member_page import (
+    DUP_ID, CONFIRM_ID, ORIGINAL_ID, SHOW_BUTTON_ID, CONFIRM_ORIGINAL_ID, REMARK_ID,
+    CONFIRM_CHECKBOX_ID, DELETE_BUTTON_ID, MESSAGE_LABEL_ID, PORTAL_BASE_URL, REMOVE_MEMBER_URL, REUSE_FORM,
+    postback_name,
+)
+from task_state import update_task_progress
+
+# Postback field names of the controls the page object knows by client ID
+DUP_FIELD = postback_name(DUP_ID)
+CONFIRM_FIELD = postback_name(CONFIRM_ID)
+ORIGINAL_FIELD = postback_name(ORIGINAL_ID)
+SHOW_BUTTON = postback_name(SHOW_BUTTON_ID)
+CONFIRM_ORIGINAL_FIELD = postback_name(CONFIRM_ORIGINAL_ID)
+REMARK_FIELD = postback_name(REMARK_ID)
+CONFIRM_CHECKBOX = postback_name(CONFIRM_CHECKBOX_ID)
+DELETE_BUTTON = postback_name(DELETE_BUTTON_ID)
+
+# Seconds to wait for a single postback before treating it as a timeout
+HTTP_TIMEOUT = float(os.environ.get("AUTOMATION_HTTP_TIMEOUT", "15"))
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/119.0 Safari/537.36")
+
+class SessionExpiredError(Exception):
+    """Raised when the portal redirects a request to the login page"""
+
+class AspNetForm(HTMLParser):
+    """Collects the first <form> of a WebForms page with its input controls"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.action = None
+        self.fields = {}
+        self._in_form = False
+        self._done = False
+        self._select = None
+        self._textarea = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self._done:
+            return
+        if tag == "option" and self._select:
+            if "selected" in attrs or not self.fields[self._select]["value"]:
+                self.fields[self._select]["value"] = attrs.get("value") or ""
+        elif tag == "form" and not self._in_form:
+            self._in_form = True
+            self.action = attrs.get("action")
+        elif not self._in_form or not attrs.get("name"):
+            return
+        elif tag == "input":
+            self.fields[attrs["name"]] = {
+                "type": (attrs.get("type") or "text").lower(),
+                "value": attrs.get("value") or "",
+                "checked": "checked" in attrs,
+                "disabled": "disabled" in attrs,
+                "onclick": attrs.get("onclick") or "",
+            }
+        elif tag == "select":
+            self._select = attrs["name"]
+            self.fields[self._select] = {"type": "select", "value": "", "checked": False,
+                                         "disabled": "disabled" in attrs, "onclick": ""}
+        elif tag == "textarea":
+            self._textarea = attrs["name"]
+            self.fields[self._textarea] = {"type": "textarea", "value": "", "checked": False,
+                                           "disabled": "disabled" in attrs, "onclick": ""}
+
+    def handle_data(self, data):
+        if self._textarea:
+            self.fields[self._textarea]["value"] += data
+
+    def handle_endtag(self, tag):
+        if tag == "form" and self._in_form:
+            self._in_form = False
+            self._done = True
+        elif tag == "select":
+            self._select = None
+        elif tag == "textarea":
+            self._textarea = None
+
+    def has(self, name):
+        return name in self.fields
+
+    def payload(self, submit=None, **overrides):
+        """Build the body a browser would post, including only the clicked button"""
+        data = {}
+        for name, field in self.fields.items():
+            if field["disabled"] or field["type"] in ("submit", "button", "image", "reset"):
+                continue
+            if field["type"] in ("checkbox", "radio"):
+                if field["checked"]:
+                    data[name] = field["value"] or "on"
+                continue
+            data[name] = field["value"]
+        if submit:
+            data[submit] = self.fields.get(submit, {}).get("value", "")
+        data.update(overrides)
+        return data
+
+def parse_form(html):
+    form = AspNetForm()
+    form.feed(html)
+    form.close()
+    if "__VIEWSTATE" not in form.fields:
+        raise Exception("Portal response is missing __VIEWSTATE")
+    return form
+
+def create_http_session(cookie_name, pool_size=4):
+    """Create a pooled requests session carrying the saved browser cookies"""
+    cookie_path = f"cookies/{cookie_name}.pkl"
+    if not os.path.exists(cookie_path):
+        raise Exception("Cookie file not found")
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+
+    bind_saved_cookies(session, cookie_name, PORTAL_BASE_URL)
+    return session
+
+def _postback(session, url, form, data):
+    response = session.post(urljoin(url, form.action or url), data=data, timeout=HTTP_TIMEOUT)
+    return _checked(response)
+
+def _checked(response):
+    response.raise_for_status()
+    if "slogin.aspx" in response.url.lower():
+        raise SessionExpiredError("Session expired: portal redirected to the login page")
+    return response
+
+def is_blank_form(form):
+    """True when ``form`` is the search stage with all three ID fields empty"""
+    return not form.has(CONFIRM_ORIGINAL_FIELD) and all(
+        form.has(name) and not form.fields[name]["value"] for name in (DUP_FIELD, CONFIRM_FIELD, ORIGINAL_FIELD))
+
+def lookup_member(session, dup, conf, orig, timeout=HTTP_TIMEOUT):
+    """Run only the BtnShow lookup for a member; return ``(removable, reason)``
+
+    ``removable`` is True when the portal offers the confirm original field,
+    False when its answer shows there is nothing to remove, and None when
+    no usable answer came back (timeouts, server errors, broken pages).
+    An expired session raises ``SessionExpiredError``.
+    """
+    try:
+        response = _checked(session.get(REMOVE_MEMBER_URL, timeout=timeout))
+        form = parse_form(response.text)
+        response = _checked(session.post(
+            urljoin(response.url, form.action or response.url),
+            data=form.payload(SHOW_BUTTON, **{DUP_FIELD: dup, CONFIRM_FIELD: conf, ORIGINAL_FIELD: orig}),
+            timeout=timeout))
+        form = parse_form(response.text)
+    except SessionExpiredError:
+        raise
+    except requests.Timeout:
+        return None, f"Timeout: lookup did not respond within {timeout:g} seconds"
+    except Exception as e:
+        return None, str(e)
+
+    if form.has(CONFIRM_ORIGINAL_FIELD):
+        return True, None
+    message = not_found_message(response.text)
+    if message:
+        return False, f"Member not found: {message}"
+    return None, "Confirm original member ID field not found in lookup response"
+
+def remove_member(session, task_id, dup, conf, orig, fam, base_progress, prefix=""):
+    """Replay the lookup and delete postbacks for a single member
+
+    With ``REUSE_FORM`` the blank form the delete postback returns is kept
+    on the session and used for the next member instead of a fresh GET.
+    """
+    def failed(error):
+        update_task_progress(task_id, base_progress, step_message=f"{prefix}⚠️ {error}", step="task_failed")
+        return False, {
+            "familyid": fam,
+            "memberid": dup,
+            "status": "Failed",
+            "error": error,
+            "timestamp": datetime.now().isoformat(),
+            "original_member": orig
+        }
+
+    lap = metrics.stopwatch("http", task_id)
+
+    # Use each kept form only once; any failure below leaves the next member to load a fresh one
+    blank_form = getattr(session, "blank_form", None) if REUSE_FORM else None
+    session.blank_form = None
+    try:
+        if blank_form is not None:
+            update_task_progress(task_id, base_progress + 1,
+                               step_message=f"{prefix}♻️ Reusing the blank form from the last delete postback", step="reuse_form")
+            url, form = blank_form
+            lap("reuse_form")
+        else:
+            update_task_progress(task_id, base_progress + 1,
+                               step_message=f"{prefix}🌐 Loading member removal form...", step="navigate")
+            response = _checked(session.get(REMOVE_MEMBER_URL, timeout=HTTP_TIMEOUT))
+            url, form = response.url, parse_form(response.text)
+            lap("navigate")
+
+        # Postback 1: fill the three ID fields and press BtnShow
+        update_task_progress(task_id, base_progress + 8,
+                           step_message=f"{prefix}🔍 Submitting lookup for {dup} (original {orig})...", step="show")
+        with rate_controller.postback(task_id, "lookup"):
+            response = _postback(session, url, form, form.payload(
+                SHOW_BUTTON, **{DUP_FIELD: dup, CONFIRM_FIELD: conf, ORIGINAL_FIELD: orig}))
+        form = parse_form(response.text)
+        lap("lookup")
+    except requests.Timeout:
+        return failed(f"Timeout: Member lookup did not respond within {HTTP_TIMEOUT:g} seconds")
+
+    if not form.has(CONFIRM_ORIGINAL_FIELD):
+        message = not_found_message(response.text)
+        if message:
+            return failed(f"Member not found: {message}")
+        return failed("Confirm original member ID field not found in lookup response")
+
+    update_task_progress(task_id, base_progress + 14,
+                       step_message=f"{prefix}✅ Confirm original member ID field found", step="wait_confirm_original")
+
+    fields = {CONFIRM_ORIGINAL_FIELD: orig, REMARK_FIELD: "okay", CONFIRM_CHECKBOX: "on"}
+    try:
+        # An AutoPostBack checkbox enables btnDelete server-side, so replay that postback too
+        checkbox = form.fields.get(CONFIRM_CHECKBOX, {})
+        delete = form.fields.get(DELETE_BUTTON, {})
+        if "__doPostBack" in checkbox.get("onclick", "") or delete.get("disabled"):
+            update_task_progress(task_id, base_progress + 24,
+                               step_message=f"{prefix}☑️ Submitting confirmation checkbox postback...", step="checkbox")
+            response = _postback(session, response.url, form, form.payload(
+                __EVENTTARGET=CONFIRM_CHECKBOX, __EVENTARGUMENT="", **fields))
+            form = parse_form(response.text)
+            lap("delete_ready")
+
+        if not form.has(DELETE_BUTTON) or form.fields[DELETE_BUTTON]["disabled"]:
+            return failed("Delete button not available after confirmation")
+
+        # Postback 2: confirm original, remark, checkbox and btnDelete
+        update_task_progress(task_id, base_progress + 32,
+                           step_message=f"{prefix}🗑️ Submitting delete postback...", step="delete")
+        with rate_controller.postback(task_id, "delete"):
+            response = _postback(session, response.url, form, form.payload(DELETE_BUTTON, **fields))
+        lap("delete")
+    except requests.Timeout:
+        return failed(f"Timeout: Delete postback did not respond within {HTTP_TIMEOUT:g} seconds")
+
+    # A 200 is not a removal: the portal re-renders the confirm stage when it rejects the delete
+    try:
+        after = parse_form(response.text)
+    except Exception:
+        after = None
+    if after is None or after.has(CONFIRM_ORIGINAL_FIELD) or not after.has(DUP_FIELD):
+        message = label_text(response.text, MESSAGE_LABEL_ID) or "portal did not return to the search form"
+        return failed(f"Delete rejected: {message}")
+    if REUSE_FORM and is_blank_form(after):
+        session.blank_form = (response.url, after)
+
+    update_task_progress(task_id, base_progress + 35,
+                       step_message=f"{prefix}✅ Member {dup} removed successfully from Family {fam}", step="removed")
+    return True, {
+        "familyid": fam,
+        "memberid": dup,
+        "status": "Removed",
+        "timestamp": datetime.now().isoformat(),
+        "original_member": orig
+    }
+
+class HttpEngine:
+    """Removal engine that posts the WebForms postbacks without a browser"""
+
+    name = "http"
+    label = "HTTP"
+
+    def open_session(self, cookie_name):
+        return create_http_session(cookie_name)
+
+    def remove_member(self, session, task_id, dup, conf, orig, fam, base_progress, prefix=""):
+        return remove_member(session, task_id, dup, conf, orig, fam, base_progress, prefix)
+
+    def close_session(self, session):
+        session.close()
+
+    def discard_session(self, session):
+        session.close()
+
+def run_automation(cookie_name, start_row, end_row, task_id=None, workers=None, resume=False):
+    """Run the removal automation over plain HTTP postbacks"""
+    # automation_script sits above this module (it reaches it through prevalidation)
+    from automation_script import run_automation as run_with_engine
+    return run_with_engine(cookie_name, start_row, end_row, task_id, workers, engine=HttpEngine(), resume=resume)
@@ -0,0 +1,401 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import log_store
+
+# Jobs allowed to run at once, overall and per saved session (cookie)
+MAX_RUNNING_JOBS = int(os.environ.get("AUTOMATION_MAX_JOBS", "2"))
+MAX_JOBS_PER_COOKIE = int(os.environ.get("AUTOMATION_JOBS_PER_COOKIE", "1"))
+
+# Seconds between scheduler passes when nothing wakes it up earlier
+SCHEDULER_INTERVAL = 5
+
+ACTIVE_STATUSES = ('queued', 'running', 'paused')
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    cookie_name TEXT NOT NULL,
+    start_row INTEGER NOT NULL,
+    end_row INTEGER NOT NULL,
+    workers INTEGER,
+    engine TEXT NOT NULL,
+    resume INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    error TEXT,
+    result TEXT,
+    parent_id TEXT,
+    shards INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+"""
+
+class JobConflict(Exception):
+    """Raised when a new job's rows overlap a job that is already running or paused"""
+
+    def __init__(self, message, job):
+        super().__init__(message)
+        self.job = job
+
+class JobControl:
+    """Stop flag a running job checks between members ('cancel' or 'pause')"""
+
+    def __init__(self):
+        self.stop_reason = None
+
+    def stop(self, reason):
+        self.stop_reason = reason
+
+    @property
+    def stop_requested(self):
+        return self.stop_reason is not None
+
+def _row_to_job(row):
+    job = dict(row)
+    job['resume'] = bool(job['resume'])
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+class JobQueue:
+    """SQLite-backed queue of automation runs with a scheduler thread
+
+    ``runner(job, control)`` executes one job and returns ``(status, result,
+    error)``; it is called on its own thread whenever the concurrency caps
+    allow. Jobs found 'running' at startup were interrupted by a restart and
+    are queued again with ``resume`` so removed members are skipped.
+
+    A sharded job is a parent row (``shards`` set) that never runs itself;
+    its sub-jobs (``parent_id`` set) are scheduled like any other job and the
+    parent's status follows theirs and is passed to
+    ``on_parent_update(parent, children)`` on every change; once the parent
+    has finished, the value that returns is stored as its result. The
+    callback runs after the scheduler lock is released, one at a time in
+    the order the changes happened, so a slow merge holds up no other job.
+    """
+
+    def __init__(self, runner, db_path=log_store.DB_PATH, max_running=MAX_RUNNING_JOBS,
+                 max_per_cookie=MAX_JOBS_PER_COOKIE, on_parent_update=None):
+        self.runner = runner
+        self.on_parent_update = on_parent_update
+        self.max_running = max(1, max_running)
+        self.max_per_cookie = max(1, max_per_cookie)
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._lock = threading.RLock()
+        self._wake = threading.Condition(self._lock)
+        self._controls = {}
+        self._thread = None
+        self._parent_updates = []   # (parent, children) waiting for on_parent_update
+        self._report_lock = threading.Lock()
+
+    def _migrate(self):
+        """Add the sharding columns to a jobs table created by an older version"""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        with self._conn:
+            for column, kind in (("parent_id", "TEXT"), ("shards", "INTEGER")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_parent ON jobs (parent_id)")
+
+    def _update(self, job_id, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._conn:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def children(self, job_id):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs WHERE parent_id = ? ORDER BY start_row",
+                                      (job_id,)).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def list_jobs(self, status=None, limit=100):
+        query, params = "SELECT * FROM jobs", []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, params + [limit]).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def submit(self, job_id, cookie_name, start_row, end_row, workers, engine, resume=False):
+        """Queue a job; returns ``(job, outcome)`` with outcome 'queued', 'merged' or 'duplicate'
+
+        A range already covered by an active job returns that job
+        ('duplicate'). A range overlapping a job that is still queued for the
+        same session and engine widens that job ('merged'). Any other overlap
+        with an active job raises ``JobConflict``.
+        """
+        with self._lock:
+            active, covering = self._overlapping(start_row, end_row)
+            if covering is not None:
+                return covering, 'duplicate'
+
+            mergeable = [row for row in active if row['status'] == 'queued' and row['parent_id'] is None
+                         and row['shards'] is None and row['cookie_name'] == cookie_name and row['engine'] == engine]
+            if active and len(mergeable) == len(active):
+                target = mergeable[0]
+                new_start = min([start_row] + [row['start_row'] for row in mergeable])
+                new_end = max([end_row] + [row['end_row'] for row in mergeable])
+                with self._conn:
+                    self._conn.execute("UPDATE jobs SET start_row = ?, end_row = ?, resume = ? WHERE job_id = ?",
+                                       (new_start, new_end, int(resume or target['resume']), target['job_id']))
+                    for row in mergeable[1:]:
+                        self._conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ?, error = ? WHERE job_id = ?",
+                                           (datetime.now().isoformat(), f"Merged into {target['job_id']}", row['job_id']))
+                self._wake.notify_all()
+                return self.get(target['job_id']), 'merged'
+
+            self._reject_overlap(active, start_row, end_row)
+
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO jobs (job_id, cookie_name, start_row, end_row, workers, engine, resume, status, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', ?)",
+                    (job_id, cookie_name, start_row, end_row, workers, engine, int(resume), datetime.now().isoformat()))
+            self._wake.notify_all()
+        return self.get(job_id), 'queued'
+
+    def submit_sharded(self, job_id, cookie_name, start_row, end_row, workers, engine, resume, ranges):
+        """Queue ``start_row:end_row`` as one sub-job per ``(start, end)`` in ``ranges``
+
+        Returns ``(parent, 'queued')``, or the covering job with 'duplicate';
+        any other overlap with an active job raises ``JobConflict``.
+        """
+        with self._lock:
+            active, covering = self._overlapping(start_row, end_row)
+            if covering is not None:
+                return covering, 'duplicate'
+            self._reject_overlap(active, start_row, end_row)
+
+            now = datetime.now().isoformat()
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO jobs (job_id, cookie_name, start_row, end_row, workers, engine, resume, status, "
+                    "created_at, shards) VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?)",
+                    (job_id, cookie_name, start_row, end_row, workers, engine, int(resume), now, len(ranges)))
+                for n, (shard_start, shard_end) in enumerate(ranges, 1):
+                    self._conn.execute(
+                        "INSERT INTO jobs (job_id, cookie_name, start_row, end_row, workers, engine, resume, status, "
+                        "created_at, parent_id) VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?)",
+                        (f"{job_id}_s{n}", cookie_name, shard_start, shard_end, workers, engine, int(resume), now, job_id))
+            self._wake.notify_all()
+        return self.get(job_id), 'queued'
+
+    def _overlapping(self, start_row, end_row):
+        """Active jobs overlapping the range, and the first one covering it whole (or None)"""
+        active = self._conn.execute(
+            f"SELECT * FROM jobs WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))}) "
+            f"AND start_row < ? AND ? < end_row ORDER BY created_at",
+            (*ACTIVE_STATUSES, end_row, start_row)).fetchall()
+        for row in active:
+            if row['start_row'] <= start_row and end_row <= row['end_row']:
+                return active, _row_to_job(row)
+        return active, None
+
+    def _reject_overlap(self, active, start_row, end_row):
+        if active:
+            blocking = _row_to_job(active[0])
+            raise JobConflict(
+                f"Rows {start_row}-{end_row} overlap job {blocking['job_id']} "
+                f"(rows {blocking['start_row']}-{blocking['end_row']}, {blocking['status']})", blocking)
+
+    def cancel(self, job_id):
+        job = self._stop(job_id, 'cancel', 'cancelled')
+        self._report_parents()
+        return job
+
+    def pause(self, job_id):
+        job = self._stop(job_id, 'pause', 'paused')
+        self._report_parents()
+        return job
+
+    def _stop(self, job_id, reason, queued_status):
+        """Stop a queued job at once, or ask a running one to stop after its current member"""
+        with self._lock:
+            job = self.get(job_id)
+            if job is not None and job['shards']:
+                for child in self.children(job_id):
+                    self._stop(child['job_id'], reason, queued_status)
+                return self._refresh_parent(job_id)
+            if job is None or job['status'] not in ('queued', 'running') and \
+                    not (reason == 'cancel' and job['status'] == 'paused'):
+                return job
+            control = self._controls.get(job_id)
+            if job['status'] == 'running' and control is not None:
+                control.stop(reason)
+            else:
+                self._update(job_id, status=queued_status,
+                             finished_at=datetime.now().isoformat() if queued_status == 'cancelled' else None)
+                if job['parent_id']:
+                    self._refresh_parent(job['parent_id'])
+            return self.get(job_id)
+
+    def resume(self, job_id):
+        """Queue a paused job again; members it already removed are skipped"""
+        job = self._resume(job_id)
+        self._report_parents()
+        return job
+
+    def _resume(self, job_id):
+        with self._lock:
+            job = self.get(job_id)
+            if job is not None and job['shards']:
+                for child in self.children(job_id):
+                    self._resume(child['job_id'])
+                return self._refresh_parent(job_id)
+            if job is None or job['status'] != 'paused':
+                return job
+            self._update(job_id, status='queued', resume=1, finished_at=None, error=None)
+            if job['parent_id']:
+                self._refresh_parent(job['parent_id'])
+            self._wake.notify_all()
+        return self.get(job_id)
+
+    def _refresh_parent(self, parent_id):
+        """Derive a sharded job's status from its sub-jobs and queue it for ``on_parent_update``"""
+        parent = self.get(parent_id)
+        if parent['status'] in FINISHED_STATUSES:
+            return parent
+        children = self.children(parent_id)
+        statuses = {child['status'] for child in children}
+
+        if statuses <= set(FINISHED_STATUSES):
+            status = 'failed' if 'failed' in statuses else 'cancelled' if 'cancelled' in statuses else 'completed'
+            failed = [child['job_id'] for child in children if child['status'] == 'failed']
+            fields = {'status': status, 'finished_at': datetime.now().isoformat(),
+                      'error': f"Sub-jobs failed: {', '.join(failed)}" if failed else None}
+        elif 'running' in statuses:
+            fields = {'status': 'running', 'started_at': parent['started_at'] or datetime.now().isoformat()}
+        else:
+            fields = {'status': 'queued' if 'queued' in statuses else 'paused'}
+
+        self._update(parent_id, **fields)
+        if self.on_parent_update is not None:
+            self._parent_updates.append((dict(parent, **fields), children))
+        return self.get(parent_id)
+
+    def _report_parents(self):
+        """Run the queued ``on_parent_update`` calls; call without holding the scheduler lock"""
+        # Whoever holds the report lock drains the queue; the others leave their updates to it
+        while self._parent_updates and self._report_lock.acquire(blocking=False):
+            try:
+                while True:
+                    with self._lock:
+                        if not self._parent_updates:
+                            break
+                        parent, children = self._parent_updates.pop(0)
+                    fields = {}
+                    try:
+                        result = self.on_parent_update(parent, children)
+                    except Exception as e:
+                        result = None
+                        fields.update(status='failed', error=str(e))
+                    if result is not None:
+                        fields['result'] = json.dumps(result)
+                    if fields:
+                        with self._lock:
+                            self._update(parent['job_id'], **fields)
+            finally:
+                self._report_lock.release()
+
+    def recover(self):
+        """Requeue jobs a previous process left 'running'; returns how many"""
+        with self._lock:
+            with self._conn:
+                count = self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', resume = 1 WHERE status = 'running' AND shards IS NULL").rowcount
+            for row in self._conn.execute("SELECT job_id FROM jobs WHERE shards IS NOT NULL AND status IN "
+                                          f"({','.join('?' * len(ACTIVE_STATUSES))})", ACTIVE_STATUSES).fetchall():
+                self._refresh_parent(row['job_id'])
+        return count
+
+    def _next_jobs(self):
+        """Queued jobs that fit under the caps right now, oldest first"""
+        # A multi-session job ("a,b") takes a slot on each of its sessions
+        running = self._conn.execute(
+            "SELECT cookie_name FROM jobs WHERE status = 'running' AND shards IS NULL").fetchall()
+        per_cookie = {}
+        for row in running:
+            for name in row['cookie_name'].split(','):
+                per_cookie[name] = per_cookie.get(name, 0) + 1
+        slots = self.max_running - len(running)
+
+        chosen = []
+        queued = self._conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' AND shards IS NULL ORDER BY created_at, start_row").fetchall()
+        for row in queued:
+            if slots <= 0:
+                break
+            names = row['cookie_name'].split(',')
+            if any(per_cookie.get(name, 0) >= self.max_per_cookie for name in names):
+                continue
+            for name in names:
+                per_cookie[name] = per_cookie.get(name, 0) + 1
+            slots -= 1
+            chosen.append(_row_to_job(row))
+        return chosen
+
+    def _start(self, job):
+        control = JobControl()
+        self._controls[job['job_id']] = control
+        self._update(job['job_id'], status='running', started_at=datetime.now().isoformat())
+        job['status'] = 'running'
+        if job['parent_id']:
+            self._refresh_parent(job['parent_id'])
+
+        def run():
+            try:
+                status, result, error = self.runner(job, control)
+            except Exception as e:
+                status, result, error = 'failed', None, str(e)
+            with self._lock:
+                self._controls.pop(job['job_id'], None)
+                self._update(job['job_id'], status=status, error=error,
+                             result=json.dumps(result) if result is not None else None,
+                             finished_at=datetime.now().isoformat() if status in FINISHED_STATUSES else None,
+                             resume=1 if status == 'paused' else int(job['resume']))
+                if job['parent_id']:
+                    self._refresh_parent(job['parent_id'])
+                self._wake.notify_all()
+            self._report_parents()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                for job in self._next_jobs():
+                    self._start(job)
+                if not self._parent_updates:
+                    self._wake.wait(SCHEDULER_INTERVAL)
+            self._report_parents()
+
+    def start(self):
+        """Recover interrupted jobs and start the scheduler thread (once)"""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            recovered = self.recover()
+            if recovered:
+                print(f"♻️ Requeued {recovered} job(s) interrupted by a restart")
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        self._report_parents()
+        return self
\ No newline at end of file
@@ -0,0 +1,295 @@
+import glob
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+import retry
+
+# SQLite journal every removal outcome is appended to as soon as it happens
+DB_PATH = os.environ.get("AUTOMATION_DB", "logs/automation.db")
+
+# Directory of the per-range CSV logs, folded into the journal for querying
+LOG_DIR = os.path.dirname(DB_PATH) or "."
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    run_range TEXT,
+    familyid TEXT,
+    memberid TEXT NOT NULL,
+    original_member TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    timestamp TEXT,
+    error_class TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_member ON results (memberid);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS idx_results_family ON results (familyid);
+CREATE INDEX IF NOT EXISTS idx_results_time ON results (timestamp);
+CREATE TABLE IF NOT EXISTS removed_members (
+    memberid TEXT PRIMARY KEY,
+    familyid TEXT,
+    original_member TEXT,
+    timestamp TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS ingested_files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER,
+    size INTEGER
+);
+CREATE TABLE IF NOT EXISTS result_counts (
+    day TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    run_range TEXT,
+    status TEXT NOT NULL,
+    error_class TEXT NOT NULL DEFAULT '',
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, run_id, status, error_class)
+);
+INSERT OR IGNORE INTO removed_members (memberid, familyid, original_member, timestamp, source)
+    SELECT memberid, familyid, original_member, timestamp, run_id FROM results WHERE status = 'Removed';
+"""
+
+COUNT_RESULT = """
+INSERT INTO result_counts (day, run_id, run_range, status, error_class, count) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (day, run_id, status, error_class) DO UPDATE SET count = count + excluded.count
+"""
+
+RESULT_COLUMNS = ("id", "run_id", "run_range", "familyid", "memberid", "original_member",
+                  "status", "error", "error_class", "timestamp")
+
+_conn = None
+_lock = threading.Lock()
+
+def _migrate(conn):
+    """Bring a journal created by an older version up to the current schema"""
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(results)")}
+    if "error_class" not in columns:
+        with conn:
+            conn.execute("ALTER TABLE results ADD COLUMN error_class TEXT")
+            conn.execute("UPDATE results SET error_class = '' WHERE status = 'Removed'")
+            # Files were only scanned for the removed index before; read them again into results
+            conn.execute("DELETE FROM ingested_files")
+        for row in conn.execute("SELECT id, error FROM results WHERE error_class IS NULL").fetchall():
+            conn.execute("UPDATE results SET error_class = ? WHERE id = ?", (retry.classify(row["error"]), row["id"]))
+        conn.commit()
+
+    if conn.execute("SELECT 1 FROM result_counts LIMIT 1").fetchone() is None:
+        with conn:
+            conn.execute(
+                "INSERT INTO result_counts (day, run_id, run_range, status, error_class, count) "
+                "SELECT COALESCE(substr(timestamp, 1, 10), ''), run_id, MAX(run_range), status, "
+                "COALESCE(error_class, ''), COUNT(*) FROM results "
+                "GROUP BY COALESCE(substr(timestamp, 1, 10), ''), run_id, status, COALESCE(error_class, '')")
+
+def get_connection():
+    """Shared connection used by every worker thread, guarded by ``_lock``"""
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        _migrate(conn)
+        _conn = conn
+    return _conn
+
+def _error_class(entry):
+    if entry["status"] == "Removed":
+        return ""
+    return entry.get("error_class") or retry.classify(entry.get("error"))
+
+def record_result(run_id, run_range, entry):
+    """Durably append one removal outcome; committed before returning"""
+    error_class = _error_class(entry)
+    timestamp = entry.get("timestamp") or datetime.now().isoformat()
+    with _lock:
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO results (run_id, run_range, familyid, memberid, original_member, status, error, timestamp, error_class) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, run_range, str(entry.get("familyid")), str(entry["memberid"]),
+                 entry.get("original_member"), entry["status"], entry.get("error"), timestamp, error_class))
+            conn.execute(COUNT_RESULT, (timestamp[:10], run_id, run_range, entry["status"], error_class, 1))
+            if entry["status"] == "Removed":
+                conn.execute(
+                    "INSERT OR REPLACE INTO removed_members (memberid, familyid, original_member, timestamp, source) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (str(entry["memberid"]), str(entry.get("familyid")), entry.get("original_member"),
+                     timestamp, run_id))
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def _path_key(path):
+    """One spelling per file, however a caller wrote its path"""
+    return os.path.realpath(path)
+
+def mark_ingested(paths):
+    """Record CSVs a run just wrote as already in the journal, so syncing never doubles them"""
+    with _lock:
+        conn = get_connection()
+        with conn:
+            for path in paths:
+                conn.execute("INSERT OR REPLACE INTO ingested_files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                             (_path_key(path), *_file_signature(path)))
+
+def _read_log_file(path):
+    """Rows of one historical CSV log as ``results`` tuples (minus id)"""
+    name = os.path.basename(path)
+    default_status = "Removed" if name.startswith("success") else "Failed"
+    match = re.search(r"_(\d+_\d+)\.csv$", name)
+    run_range = match.group(1) if match else None
+    fallback_time = datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+
+    try:
+        data = pd.read_csv(path, dtype=str)
+    except pd.errors.EmptyDataError:
+        return []
+    data = data.reindex(columns=["familyid", "memberid", "original_member", "status", "error", "timestamp"])
+    data = data.dropna(subset=["memberid"])
+    data = data.astype(object).where(data.notna(), None)
+
+    rows = []
+    for fam, member, orig, status, error, timestamp in data.itertuples(index=False):
+        status = status or default_status
+        entry = {"status": status, "error": error}
+        rows.append((f"file:{name}", run_range, fam, str(member), orig, status, error,
+                     timestamp or fallback_time, _error_class(entry)))
+    return rows
+
+def sync_log_files(log_dir=LOG_DIR):
+    """Fold CSV logs that are new or changed since the last sync into the journal
+
+    Success and failure logs become ``results`` rows (run id ``file:<name>``)
+    and removals also enter the removed-member index. Files already ingested
+    with the same mtime and size are not read again, and the ``*_latest``
+    views are skipped. Returns how many member IDs the removed index gained.
+    """
+    with _lock:
+        conn = get_connection()
+        known = {_path_key(row["path"]): (row["mtime_ns"], row["size"])
+                 for row in conn.execute("SELECT path, mtime_ns, size FROM ingested_files")}
+
+    added = 0
+    paths = glob.glob(os.path.join(log_dir, "success_removed_*.csv")) + \
+        glob.glob(os.path.join(log_dir, "failed_removal_*.csv"))
+    for path in sorted(paths):
+        if path.endswith("_latest.csv"):
+            continue
+        signature = _file_signature(path)
+        if known.get(_path_key(path)) == signature:
+            continue
+        try:
+            rows = _read_log_file(path)
+        except Exception as e:
+            print(f"⚠️ Skipping unreadable log {path}: {e}")
+            continue
+
+        run_id = f"file:{os.path.basename(path)}"
+        with _lock:
+            conn = get_connection()
+            with conn:
+                # A rewritten file replaces what was ingested from it before
+                conn.execute("DELETE FROM results WHERE run_id = ?", (run_id,))
+                conn.execute("DELETE FROM result_counts WHERE run_id = ?", (run_id,))
+                conn.executemany(
+                    "INSERT INTO results (run_id, run_range, familyid, memberid, original_member, status, error, timestamp, error_class) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                for row in rows:
+                    conn.execute(COUNT_RESULT, (row[7][:10], run_id, row[1], row[5], row[8], 1))
+
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO removed_members (memberid, familyid, original_member, timestamp, source) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(row[3], row[2], row[4], row[7], run_id) for row in rows if row[5] == "Removed"])
+                added += conn.total_changes - before
+                conn.execute("INSERT OR REPLACE INTO ingested_files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                             (_path_key(path), *signature))
+    return added
+
+def _filters(member=None, family=None, run_id=None, status=None, error_class=None, since=None, until=None):
+    clauses, params = [], []
+    for column, value in (("memberid", member), ("familyid", family), ("run_id", run_id),
+                          ("status", status), ("error_class", error_class)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(str(value))
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        # A bare date includes the whole day
+        clauses.append("timestamp < ?" if len(until) > 10 else "substr(timestamp, 1, 10) <= ?")
+        params.append(until)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def query_results(member=None, family=None, run_id=None, status=None, error_class=None,
+                  since=None, until=None, limit=100, offset=0):
+    """One page of journal rows, newest first, with the total number of matches"""
+    where, params = _filters(member, family, run_id, status, error_class, since, until)
+    with _lock:
+        conn = get_connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join(RESULT_COLUMNS)} FROM results{where} "
+            f"ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+    return [dict(row) for row in rows], total
+
+def aggregates(since=None, until=None, run_id=None):
+    """Outcome counts by status/error class and by run, from the running totals"""
+    clauses, params = [], []
+    if since:
+        clauses.append("day >= ?")
+        params.append(since[:10])
+    if until:
+        clauses.append("day <= ?")
+        params.append(until[:10])
+    if run_id:
+        clauses.append("run_id = ?")
+        params.append(run_id)
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+    with _lock:
+        conn = get_connection()
+        by_class = conn.execute(
+            f"SELECT status, error_class, SUM(count) AS count FROM result_counts{where} "
+            f"GROUP BY status, error_class ORDER BY count DESC", params).fetchall()
+        by_run = conn.execute(
+            f"SELECT run_id, MAX(run_range) AS run_range, MIN(day) AS first_day, MAX(day) AS last_day, "
+            f"SUM(CASE WHEN status = 'Removed' THEN count ELSE 0 END) AS removed, "
+            f"SUM(CASE WHEN status = 'Failed' THEN count ELSE 0 END) AS failed, "
+            f"SUM(CASE WHEN status = 'Retrying' THEN count ELSE 0 END) AS retried "
+            f"FROM result_counts{where} GROUP BY run_id ORDER BY last_day DESC, run_id", params).fetchall()
+    return {
+        'by_error_class': [dict(row) for row in by_class],
+        'by_run': [dict(row) for row in by_run]
+    }
+
+def removed_entries(member_ids):
+    """Removal record for each of ``member_ids`` found in the removed-member index"""
+    member_ids = [str(member) for member in member_ids]
+    found = {}
+    with _lock:
+        conn = get_connection()
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(member_ids), 500):
+            chunk = member_ids[i:i + 500]
+            rows = conn.execute(
+                f"SELECT familyid, memberid, original_member, timestamp FROM removed_members "
+                f"WHERE memberid IN ({','.join('?' * len(chunk))})",
+                chunk).fetchall()
+            for row in rows:
+                found[row["memberid"]] = dict(row)
+    return found
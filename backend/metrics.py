@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the step latency histogram buckets
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 15, 30, 60)
+
+# Per-task samples kept for percentiles; histograms keep counting past this
+TASK_SAMPLES = 5000
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+
+class TaskTimings:
+    """Step samples and member outcomes of one task, for its result summary"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.samples = {}
+        self.members = 0
+        self.pruned = 0
+
+    def observe(self, step, seconds):
+        self.samples.setdefault(step, deque(maxlen=TASK_SAMPLES)).append(seconds)
+
+_lock = threading.Lock()
+_steps = {}       # (engine, step) -> Histogram
+_members = {}     # (engine, status) -> count
+_pruned = {}      # engine -> members the pre-check left out of the delete pass
+_tasks = {}       # task_id -> TaskTimings
+
+def observe(step, seconds, engine="", task_id=None):
+    with _lock:
+        _steps.setdefault((engine, step), Histogram()).observe(seconds)
+        if task_id is not None:
+            _tasks.setdefault(task_id, TaskTimings()).observe(step, seconds)
+
+@contextmanager
+def span(step, engine="", task_id=None):
+    """Time the enclosed block as ``step`` (also when it raises)"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        observe(step, time.monotonic() - started, engine, task_id)
+
+def stopwatch(engine="", task_id=None):
+    """Return ``lap(step)``, which records the time since the previous lap as ``step``"""
+    last = [time.monotonic()]
+    def lap(step):
+        now = time.monotonic()
+        observe(step, now - last[0], engine, task_id)
+        last[0] = now
+    return lap
+
+def count_member(status, engine="", task_id=None):
+    with _lock:
+        _members[(engine, status)] = _members.get((engine, status), 0) + 1
+        if task_id is not None:
+            _tasks.setdefault(task_id, TaskTimings()).members += 1
+
+def count_pruned(engine="", task_id=None):
+    """Count a member the pre-check pruned; kept out of ``count_member`` and the task's throughput"""
+    with _lock:
+        _pruned[engine] = _pruned.get(engine, 0) + 1
+        if task_id is not None:
+            _tasks.setdefault(task_id, TaskTimings()).pruned += 1
+
+def start_task(task_id):
+    """Reset the task's clock; throughput is measured from here"""
+    if task_id is None:
+        return
+    with _lock:
+        _tasks[task_id] = TaskTimings()
+
+def _percentile(samples, q):
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+def task_summary(task_id, forget=True):
+    """Throughput and per-step p50/p95 of one task"""
+    with _lock:
+        timings = _tasks.pop(task_id, None) if forget else _tasks.get(task_id)
+        if timings is None:
+            return None
+        samples = {step: sorted(values) for step, values in timings.samples.items()}
+        members = timings.members
+        pruned = timings.pruned
+        elapsed = time.monotonic() - timings.started
+
+    return {
+        'elapsed_seconds': round(elapsed, 1),
+        'members_per_min': round(members / (elapsed / 60), 2) if elapsed > 0 else 0,
+        'pruned_members': pruned,
+        'steps': {
+            step: {
+                'count': len(values),
+                'p50': round(_percentile(values, 0.5), 3),
+                'p95': round(_percentile(values, 0.95), 3),
+                'total': round(sum(values), 1)
+            }
+            for step, values in samples.items()
+        }
+    }
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+def render(gauges=None):
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        steps = {key: (list(h.counts), h.count, h.sum) for key, h in _steps.items()}
+        members = dict(_members)
+        pruned = dict(_pruned)
+
+    lines = [
+        "# HELP automation_step_seconds Time spent in each step of a member removal",
+        "# TYPE automation_step_seconds histogram",
+    ]
+    for (engine, step), (counts, count, total) in sorted(steps.items()):
+        for bound, bucket in zip(BUCKETS, counts):
+            lines.append(f"automation_step_seconds_bucket{_labels(engine=engine, step=step, le=bound)} {bucket}")
+        lines.append(f"automation_step_seconds_bucket{_labels(engine=engine, step=step, le='+Inf')} {count}")
+        lines.append(f"automation_step_seconds_sum{_labels(engine=engine, step=step)} {total:.6f}")
+        lines.append(f"automation_step_seconds_count{_labels(engine=engine, step=step)} {count}")
+
+    lines += [
+        "# HELP automation_members_total Members processed, by final status",
+        "# TYPE automation_members_total counter",
+    ]
+    for (engine, status), count in sorted(members.items()):
+        lines.append(f"automation_members_total{_labels(engine=engine, status=status)} {count}")
+
+    lines += [
+        "# HELP automation_pruned_members_total Members the pre-check left out of the delete pass",
+        "# TYPE automation_pruned_members_total counter",
+    ]
+    for engine, count in sorted(pruned.items()):
+        lines.append(f"automation_pruned_members_total{_labels(engine=engine)} {count}")
+
+    for name, (help_text, value) in (gauges or {}).items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
\ No newline at end of file
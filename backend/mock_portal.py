@@ -0,0 +1,235 @@
+"""Local stand-in for the Samagra portal pages used by the automation.
+
+Serves ``sLogin.aspx`` and ``Remove_Member.aspx`` with the same element IDs,
+field names and WebForms postback fields (``__VIEWSTATE``/``__EVENTVALIDATION``)
+as the live site, so both removal engines can run offline:
+
+    python mock_portal.py --port 5055 --write-cookie mock
+    SAMAGRA_PORTAL_URL=http://127.0.0.1:5055 python app.py
+
+Latency and failures can be injected to see how the automation copes, e.g.
+``--latency 0.3 --jitter 0.2 --error-rate 0.02 --not-found-rate 0.05``.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import pickle
+import random
+import threading
+import time
+import uuid
+from html import escape
+
+from flask import Flask, make_response, redirect, request
+
+from remove_member_page import (
+    PREFIX_ID, DUP_ID, CONFIRM_ID, ORIGINAL_ID, SHOW_BUTTON_ID, CONFIRM_ORIGINAL_ID, REMARK_ID,
+    CONFIRM_CHECKBOX_ID, DELETE_BUTTON_ID, MESSAGE_LABEL_ID, postback_name,
+)
+
+SESSION_COOKIE = "ASP.NET_SessionId"
+VALIDATION_SECRET = "mock-portal"
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>{title}</title></head>
+<body>
+<form method="post" action="{action}" id="aspnetForm">
+<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="" />
+<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="" />
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{validation}" />
+<script type="text/javascript">
+function __doPostBack(eventTarget, eventArgument) {{
+    var form = document.getElementById('aspnetForm');
+    form.__EVENTTARGET.value = eventTarget;
+    form.__EVENTARGUMENT.value = eventArgument;
+    form.submit();
+}}
+</script>
+{body}
+</form>
+</body></html>"""
+
+def _control(client_id, kind="text", value="", extra=""):
+    return (f'<input type="{kind}" name="{postback_name(client_id)}" id="{client_id}" '
+            f'value="{escape(value)}" {extra}/>')
+
+def _label(message):
+    return f'<span id="{MESSAGE_LABEL_ID}" class="msg">{escape(message)}</span>'
+
+def _encode_state(state):
+    return base64.b64encode(json.dumps(state).encode()).decode()
+
+def _decode_state(value):
+    try:
+        return json.loads(base64.b64decode(value.encode()).decode())
+    except Exception:
+        return None
+
+def _validation_for(viewstate):
+    return hashlib.sha1(f"{VALIDATION_SECRET}:{viewstate}".encode()).hexdigest()
+
+def _hashed_fraction(member):
+    return int(hashlib.sha1(member.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+def create_app(not_found=(), latency=0.0, jitter=0.0, error_rate=0.0, hang_rate=0.0, hang_seconds=30.0,
+               expire_rate=0.0, not_found_rate=0.0, seed=None):
+    """Build the stand-in portal
+
+    Member IDs in ``not_found`` fail the lookup, as does a stable
+    ``not_found_rate`` fraction of all IDs. Every removal page request waits
+    ``latency`` plus up to ``jitter`` seconds; ``error_rate`` of them answer
+    HTTP 500, ``hang_rate`` stall for ``hang_seconds`` and ``expire_rate``
+    redirect to the login page as if the session had expired. Setting
+    ``app.config["LOGGED_OUT"]`` expires every session for good, and
+    ``app.config["REJECT_DELETE"]`` answers every delete with the confirm
+    stage and a validation message instead of removing the member.
+    """
+    app = Flask(__name__)
+    app.config["NOT_FOUND"] = {str(member) for member in not_found}
+    app.config["REMOVED"] = set()
+    app.config["SESSIONS"] = set()
+    app.config["LOGGED_OUT"] = False
+    app.config["REJECT_DELETE"] = False
+    lock = threading.Lock()
+    rng = random.Random(seed)
+
+    def draw():
+        with lock:
+            return rng.random()
+
+    def inject_faults():
+        """Delay the request and maybe replace it with a failure response"""
+        delay = latency + (draw() * jitter if jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if hang_rate and draw() < hang_rate:
+            time.sleep(hang_seconds)
+        if error_rate and draw() < error_rate:
+            return "Server Error in '/' Application.", 500
+        if expire_rate and draw() < expire_rate:
+            return redirect("/Login/Public/sLogin.aspx?ReturnUrl=/MemberMgmt/Pages/Remove_Member.aspx")
+        return None
+
+    def render(stage, message="", values=None):
+        values = values or {}
+        viewstate = _encode_state({"stage": stage, **values})
+        body = [
+            _label(message),
+            _control(DUP_ID, value=values.get("dup", "")),
+            _control(CONFIRM_ID, value=values.get("conf", "")),
+            _control(ORIGINAL_ID, value=values.get("orig", "")),
+            _control(SHOW_BUTTON_ID, "submit", "Show"),
+        ]
+        if stage == "confirm":
+            body += [
+                f'<div id="{PREFIX_ID}pnlDetails">Member {escape(values["dup"])} '
+                f'duplicate of {escape(values["orig"])}</div>',
+                _control(CONFIRM_ORIGINAL_ID),
+                _control(REMARK_ID),
+                _control(CONFIRM_CHECKBOX_ID, "checkbox"),
+                _control(DELETE_BUTTON_ID, "submit", "Delete"),
+            ]
+        return PAGE.format(title="Remove Member", action="./Remove_Member.aspx", viewstate=viewstate,
+                           validation=_validation_for(viewstate), body="\n".join(body))
+
+    def authenticated():
+        if app.config["LOGGED_OUT"]:
+            return False
+        return request.cookies.get(SESSION_COOKIE) in app.config["SESSIONS"] or \
+            request.cookies.get(SESSION_COOKIE) == "mock-session"
+
+    @app.route("/Login/Public/sLogin.aspx", methods=["GET", "POST"])
+    def login():
+        session_id = request.cookies.get(SESSION_COOKIE) or uuid.uuid4().hex
+        if request.method == "POST":
+            with lock:
+                app.config["SESSIONS"].add(session_id)
+            return redirect("/MemberMgmt/Pages/Remove_Member.aspx")
+
+        viewstate = _encode_state({"stage": "login"})
+        body = "\n".join([
+            '<input type="text" name="txtUserName" id="txtUserName" />',
+            '<input type="password" name="txtPassword" id="txtPassword" />',
+            '<input type="submit" name="btnLogin" id="btnLogin" value="Login" />',
+        ])
+        response = make_response(PAGE.format(title="Login", action="./sLogin.aspx", viewstate=viewstate,
+                                              validation=_validation_for(viewstate), body=body))
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True)
+        return response
+
+    @app.route("/MemberMgmt/Pages/Remove_Member.aspx", methods=["GET", "POST"])
+    def remove_member():
+        if not authenticated():
+            return redirect("/Login/Public/sLogin.aspx?ReturnUrl=/MemberMgmt/Pages/Remove_Member.aspx")
+
+        fault = inject_faults()
+        if fault is not None:
+            return fault
+
+        if request.method == "GET":
+            return render("search")
+
+        viewstate = request.form.get("__VIEWSTATE", "")
+        state = _decode_state(viewstate)
+        if state is None or request.form.get("__EVENTVALIDATION") != _validation_for(viewstate):
+            return "Invalid postback or callback argument.", 500
+
+        field = lambda client_id: request.form.get(postback_name(client_id), "").strip()
+
+        if postback_name(SHOW_BUTTON_ID) in request.form:
+            dup, conf, orig = field(DUP_ID), field(CONFIRM_ID), field(ORIGINAL_ID)
+            values = {"dup": dup, "conf": conf, "orig": orig}
+            if not dup or dup != conf or dup == orig:
+                return render("search", "Please enter valid Samagra IDs", values)
+            with lock:
+                missing = dup in app.config["NOT_FOUND"] or dup in app.config["REMOVED"] or \
+                    (not_found_rate and _hashed_fraction(dup) < not_found_rate)
+            if missing:
+                return render("search", "Record not found", values)
+            return render("confirm", values=values)
+
+        if postback_name(DELETE_BUTTON_ID) in request.form and state.get("stage") == "confirm":
+            values = {"dup": state["dup"], "conf": state["conf"], "orig": state["orig"]}
+            if field(CONFIRM_ORIGINAL_ID) != state["orig"] or not field(CONFIRM_CHECKBOX_ID) or \
+                    not field(REMARK_ID) or app.config["REJECT_DELETE"]:
+                return render("confirm", "Please confirm the original member ID", values)
+            with lock:
+                app.config["REMOVED"].add(state["dup"])
+            return render("search", f"Member {state['dup']} removed successfully")
+
+        return render("search")
+
+    return app
+
+def write_cookie(cookie_name, host):
+    """Save a session cookie the stand-in portal accepts under cookies/<name>.pkl"""
+    os.makedirs("cookies", exist_ok=True)
+    with open(f"cookies/{cookie_name}.pkl", "wb") as f:
+        pickle.dump([{"name": SESSION_COOKIE, "value": "mock-session", "path": "/", "domain": host}], f)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Samagra portal")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--not-found", nargs="*", default=[], help="member IDs whose lookup should fail")
+    parser.add_argument("--write-cookie", metavar="NAME", help="also save a matching cookie file")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every removal page request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra seconds on top of --latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answering HTTP 500")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests that stall")
+    parser.add_argument("--hang-seconds", type=float, default=30.0, help="how long a stalled request takes")
+    parser.add_argument("--expire-rate", type=float, default=0.0, help="fraction of requests redirected to login")
+    parser.add_argument("--not-found-rate", type=float, default=0.0, help="fraction of member IDs never found")
+    parser.add_argument("--seed", type=int, help="seed for reproducible fault injection")
+    args = parser.parse_args()
+
+    if args.write_cookie:
+        write_cookie(args.write_cookie, args.host)
+        print(f"🔐 Saved cookies/{args.write_cookie}.pkl for the mock portal")
+
+    create_app(args.not_found, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+               hang_rate=args.hang_rate, hang_seconds=args.hang_seconds, expire_rate=args.expire_rate,
+               not_found_rate=args.not_found_rate, seed=args.seed).run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+
+import dataset
+import log_store
+
+# Where the per-input-file task index is persisted between restarts
+PLAN_CACHE_DIR = os.environ.get("AUTOMATION_PLAN_CACHE", "cache")
+
+# Rows per sub-job when a large range is split up (0 disables splitting)
+SHARD_ROWS = int(os.environ.get("AUTOMATION_SHARD_ROWS", "500"))
+
+PLAN_VERSION = 1
+
+_plans = {}
+_lock = threading.Lock()
+
+def build_plan(data):
+    """Pair every member with the next member of its family (the last one with the previous)
+
+    ``data`` is the (familyid, memberid) frame of the whole input file. Each
+    family is anchored at its first row; the result is ordered by anchor row
+    and then by member position, and single-member families are dropped.
+    """
+    data = data.reset_index(drop=True).assign(row=np.arange(len(data)))
+    families = data.groupby("familyid", sort=False)
+
+    position = families.cumcount().to_numpy()
+    size = families["memberid"].transform("size").to_numpy()
+    next_member = families["memberid"].shift(-1)
+    previous_member = families["memberid"].shift(1)
+    original = next_member.where(position < size - 1, previous_member)
+    anchor = families["row"].transform("min").to_numpy()
+
+    plan = pd.DataFrame({
+        "anchor_row": anchor,
+        "familyid": data["familyid"].to_numpy(),
+        "duplicate": data["memberid"].to_numpy(),
+        "original": original.to_numpy(),
+        "position": position,
+        "family_size": size,
+    })
+    plan = plan[plan["family_size"] > 1]
+    return plan.sort_values(["anchor_row", "position"], kind="stable").reset_index(drop=True)
+
+def _cache_path(path):
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    return os.path.join(PLAN_CACHE_DIR, f"plan_{digest}.pkl")
+
+def load_plan(path=dataset.DATA_FILE):
+    """Return the task index for ``path``, building it only when the file changed
+
+    The index lives in memory and is pickled under ``PLAN_CACHE_DIR`` so a
+    restarted server does not have to rebuild it either.
+    """
+    signature = dataset.file_signature(path)
+    with _lock:
+        cached = _plans.get(path)
+        if cached and cached[0] == signature:
+            return cached[1], cached[2]
+
+        cache_path = _cache_path(path)
+        try:
+            with open(cache_path, "rb") as f:
+                stored = pickle.load(f)
+            if stored["version"] == PLAN_VERSION and stored["signature"] == signature:
+                _plans[path] = (signature, stored["plan"], stored["total_rows"])
+                return stored["plan"], stored["total_rows"]
+        except (OSError, EOFError, KeyError, pickle.UnpicklingError):
+            pass
+
+        data, _ = dataset.load_members(path)
+        plan = build_plan(data)
+        _plans[path] = (signature, plan, len(data))
+
+        os.makedirs(PLAN_CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": PLAN_VERSION, "signature": signature,
+                         "plan": plan, "total_rows": len(data)}, f)
+        os.replace(tmp_path, cache_path)
+        return plan, len(data)
+
+def plan_range(start_row, end_row, path=dataset.DATA_FILE):
+    """Removal tasks for the families whose first row falls in ``start_row:end_row``
+
+    A family straddling ``end_row`` is taken whole and one straddling
+    ``start_row`` belongs to the previous range, so consecutive ranges never
+    split a family or process it twice. Returns a list of per-family task
+    lists of (duplicate, confirm, original, familyid) plus the number of
+    families and input rows covered.
+    """
+    plan, total_rows = load_plan(path)
+    anchors = plan["anchor_row"].to_numpy()
+    lo, hi = np.searchsorted(anchors, [start_row, end_row], side="left")
+    window = plan.iloc[lo:hi]
+
+    family_tasks = []
+    current_family = None
+    for fam, dup, orig in zip(window["familyid"], window["duplicate"], window["original"]):
+        if fam != current_family:
+            family_tasks.append([])
+            current_family = fam
+        family_tasks[-1].append((dup, dup, orig, fam))
+
+    rows_covered = int(window.drop_duplicates("familyid")["family_size"].sum())
+    return family_tasks, rows_covered, total_rows
+
+def shard_range(start_row, end_row, shard_rows=SHARD_ROWS, path=dataset.DATA_FILE):
+    """Split ``start_row:end_row`` into consecutive sub-ranges of about ``shard_rows`` rows
+
+    Every boundary is moved forward to the first row of a family, so with
+    plan_range's anchoring each family lands in exactly one sub-range.
+    Returns a single range when the input is too small to split.
+    """
+    if shard_rows <= 0 or end_row - start_row <= shard_rows:
+        return [(start_row, end_row)]
+
+    plan, _ = load_plan(path)
+    anchors = plan["anchor_row"].to_numpy()
+    bounds = [start_row]
+    for nominal in range(start_row + shard_rows, end_row, shard_rows):
+        i = np.searchsorted(anchors, nominal, side="left")
+        boundary = int(anchors[i]) if i < len(anchors) else end_row
+        if bounds[-1] < boundary < end_row:
+            bounds.append(boundary)
+    bounds.append(end_row)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def exclude_removed(family_tasks):
+    """Drop members the removed-member index already has; return (remaining tasks, removed entries)"""
+    already_removed = log_store.removed_entries(task[0] for tasks in family_tasks for task in tasks)
+    if not already_removed:
+        return family_tasks, {}
+
+    remaining = []
+    for tasks in family_tasks:
+        pending = [task for task in tasks if task[0] not in already_removed]
+        if pending:
+            remaining.append(pending)
+    return remaining, already_removed
\ No newline at end of file
@@ -0,0 +1,92 @@
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+import rate_controller
+from http_engine import create_http_session, lookup_member, SessionExpiredError
+
+# Concurrent lookups per saved session during the pre-check
+PREVALIDATE_WORKERS = int(os.environ.get("AUTOMATION_PREVALIDATE_WORKERS", "4"))
+
+# Seconds each pre-check request may take; a member without an answer stays in the delete pass
+PREVALIDATE_TIMEOUT = float(os.environ.get("AUTOMATION_PREVALIDATE_TIMEOUT", "5"))
+
+def check_members(family_tasks, cookie_names, on_checked=None, stopped=None, rate=None, task_id=None,
+                  max_workers=None, workers=PREVALIDATE_WORKERS, timeout=PREVALIDATE_TIMEOUT):
+    """Look every member up once over HTTP, concurrently; return ``(families, pruned)``
+
+    ``families`` keeps the members the portal offers for removal, plus any
+    whose lookup got no clear answer, in their original family order;
+    families left empty are dropped. ``pruned`` lists ``(task, reason)``
+    for the members the portal answered have nothing to remove.
+    ``on_checked(done, total)`` reports progress, and ``stopped()``
+    returning True ends the check early (unchecked members are kept).
+    With ``rate`` (the run's ``RateController``) each lookup holds one of
+    its slots, waits its delay and is reported to the task's controller;
+    ``max_workers`` caps the lookups in flight across all sessions.
+    """
+    member_queue = queue.Queue()
+    for i, tasks in enumerate(family_tasks):
+        for j, task in enumerate(tasks):
+            member_queue.put(((i, j), task))
+    total = member_queue.qsize()
+
+    answers = {}
+    lock = threading.Lock()
+
+    def worker(cookie):
+        try:
+            session = create_http_session(cookie, pool_size=1)
+        except Exception as e:
+            print(f"⚠️ Pre-check session for {cookie} failed to start: {e}")
+            return
+        try:
+            while not (stopped and stopped()):
+                try:
+                    key, task = member_queue.get_nowait()
+                except queue.Empty:
+                    break
+                dup, conf, orig, fam = task
+                try:
+                    with rate.slot() if rate is not None else nullcontext():
+                        started = time.monotonic()
+                        answer = lookup_member(session, dup, conf, orig, timeout)
+                except SessionExpiredError:
+                    # Leave this session's members to the delete pass and its session checks
+                    member_queue.put((key, task))
+                    break
+                rate_controller.observe(task_id, "lookup", time.monotonic() - started, answer[0] is not None)
+                if rate is not None and rate.delay:
+                    time.sleep(rate.delay)
+                with lock:
+                    answers[key] = answer
+                    done = len(answers)
+                if on_checked is not None:
+                    on_checked(done, total)
+        finally:
+            session.close()
+
+    # Round-robin over the sessions so a cap still reaches every one of them
+    names = [cookie for _ in range(max(1, workers)) for cookie in cookie_names]
+    if max_workers:
+        names = names[:max(1, max_workers)]
+    threads = [threading.Thread(target=worker, args=(cookie,), daemon=True) for cookie in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    families, pruned = [], []
+    for i, tasks in enumerate(family_tasks):
+        kept = []
+        for j, task in enumerate(tasks):
+            removable, reason = answers.get((i, j), (None, None))
+            if removable is False:
+                pruned.append((task, reason))
+            else:
+                kept.append(task)
+        if kept:
+            families.append(kept)
+    return families, pruned
\ No newline at end of file
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Adapt workers and delay to the portal; 0 keeps the requested workers and AUTOMATION_TASK_DELAY fixed
+RATE_CONTROL = os.environ.get("AUTOMATION_RATE_CONTROL", "1") == "1"
+
+# Average BtnShow/btnDelete postback time (seconds) above which the portal counts as overloaded
+TARGET_LATENCY = float(os.environ.get("AUTOMATION_TARGET_LATENCY", "5"))
+
+# Share of failed postbacks above which the portal counts as overloaded
+MAX_ERROR_RATE = float(os.environ.get("AUTOMATION_MAX_ERROR_RATE", "0.1"))
+
+# Postbacks measured before each adjustment
+RATE_WINDOW = int(os.environ.get("AUTOMATION_RATE_WINDOW", "20"))
+
+# Delay step (seconds) for backing off and recovering, and its ceiling
+DELAY_STEP = float(os.environ.get("AUTOMATION_DELAY_STEP", "0.5"))
+MAX_DELAY = float(os.environ.get("AUTOMATION_MAX_DELAY", "10"))
+
+class RateController:
+    """AIMD control of a run's in-flight members and the delay between them
+
+    Every ``window`` postback samples, an overloaded portal (average latency
+    over ``target_latency`` or error share over ``max_error_rate``) halves
+    the workers allowed in flight and doubles the delay; a healthy one first
+    takes one delay step off, then lets one more worker in, up to the
+    requested count. ``on_change(snapshot, reason)`` is called after every
+    change.
+    """
+
+    def __init__(self, max_workers, delay=0.0, adaptive=RATE_CONTROL, on_change=None,
+                 target_latency=TARGET_LATENCY, max_error_rate=MAX_ERROR_RATE, window=RATE_WINDOW):
+        self.max_workers = max(1, max_workers)
+        self.limit = self.max_workers
+        self.min_delay = delay
+        self.delay = delay
+        self.adaptive = adaptive
+        self.on_change = on_change
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self.window = max(1, window)
+        self.latency = None
+        self.error_rate = None
+        self.adjustments = 0
+        self._samples = []
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the in-flight places for the enclosed member"""
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def observe(self, step, seconds, ok=True):
+        """Record one postback (``step`` is 'lookup' or 'delete'); adjust once the window is full"""
+        if not self.adaptive:
+            return
+        with self._cond:
+            self._samples.append((seconds, ok))
+            if len(self._samples) < self.window:
+                return
+            samples, self._samples = self._samples, []
+            self.latency = sum(seconds for seconds, _ in samples) / len(samples)
+            self.error_rate = sum(1 for _, good in samples if not good) / len(samples)
+            limit, delay = self.limit, self.delay
+            if self.latency > self.target_latency or self.error_rate > self.max_error_rate:
+                self.limit = max(1, self.limit // 2)
+                self.delay = min(MAX_DELAY, max(self.delay * 2, self.min_delay + DELAY_STEP))
+                reason = "backing off"
+            elif self.delay > self.min_delay:
+                self.delay = max(self.min_delay, round(self.delay - DELAY_STEP, 3))
+                reason = "speeding up"
+            else:
+                self.limit = min(self.max_workers, self.limit + 1)
+                reason = "speeding up"
+            if (limit, delay) == (self.limit, self.delay):
+                return
+            self.adjustments += 1
+            # More room may have opened up for waiting workers
+            self._cond.notify_all()
+        if self.on_change is not None:
+            self.on_change(self.snapshot(), reason)
+
+    def snapshot(self):
+        return {
+            'adaptive': self.adaptive,
+            'workers': self.limit,
+            'max_workers': self.max_workers,
+            'delay': round(self.delay, 2),
+            'latency': round(self.latency, 2) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 3) if self.error_rate is not None else None,
+            'adjustments': self.adjustments
+        }
+
+_lock = threading.Lock()
+_controllers = {}   # task_id -> RateController
+
+def register(task_id, controller):
+    with _lock:
+        _controllers[task_id] = controller
+
+def unregister(task_id):
+    with _lock:
+        _controllers.pop(task_id, None)
+
+def observe(task_id, step, seconds, ok=True):
+    """Feed a postback sample to the task's controller, if it has one"""
+    with _lock:
+        controller = _controllers.get(task_id)
+    if controller is not None:
+        controller.observe(step, seconds, ok)
+
+@contextmanager
+def postback(task_id, step):
+    """Time the enclosed postback for the task's controller; raising counts as an error"""
+    started = time.monotonic()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        observe(task_id, step, time.monotonic() - started, ok)
\ No newline at end of file
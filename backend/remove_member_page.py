@@ -0,0 +1,207 @@
+import os
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoAlertPresentException, StaleElementReferenceException, WebDriverException
+
+from waits import not_found_message
+
+# Base URL of the Samagra portal, overridable to point runs at a local stand-in
+PORTAL_BASE_URL = os.environ.get("SAMAGRA_PORTAL_URL", "https://spr.samagra.gov.in").rstrip("/")
+LOGIN_URL = f"{PORTAL_BASE_URL}/Login/Public/sLogin.aspx"
+REMOVE_MEMBER_URL = f"{PORTAL_BASE_URL}/MemberMgmt/Pages/Remove_Member.aspx"
+
+# Start the next member on the blank form the delete postback returns instead of reloading the page
+REUSE_FORM = os.environ.get("AUTOMATION_REUSE_FORM", "1") != "0"
+
+# ASP.NET client IDs of the Remove_Member.aspx controls; the one place they are defined
+PREFIX_ID = "ctl00_ctl00_SamagraMain_ContentPlaceHolder1_"
+DUP_ID = PREFIX_ID + "txtDupSamagraId"
+CONFIRM_ID = PREFIX_ID + "txtConfirmSamagraId"
+ORIGINAL_ID = PREFIX_ID + "txtOriSamagraId"
+SHOW_BUTTON_ID = PREFIX_ID + "BtnShow"
+CONFIRM_ORIGINAL_ID = PREFIX_ID + "txtConfirlOriSamagraId"
+REMARK_ID = PREFIX_ID + "txtRemoveRemark"
+CONFIRM_CHECKBOX_ID = PREFIX_ID + "chkconfirm"
+DELETE_BUTTON_ID = PREFIX_ID + "btnDelete"
+MESSAGE_LABEL_ID = PREFIX_ID + "lblMsg"
+
+# ASP.NET renders server control IDs with '_' and posts them back with '$'
+PREFIX_NAME = "ctl00$ctl00$SamagraMain$ContentPlaceHolder1$"
+
+def postback_name(client_id):
+    """Form field name a control with ``client_id`` is posted back under"""
+    return PREFIX_NAME + client_id[len(PREFIX_ID):]
+
+# Remark the portal requires for every removal
+REMOVE_REMARK = "okay"
+
+# Set each field and fire 'input' like typing would; 'change' is left out so no
+# AutoPostBack fires halfway. The click is deferred so the script returns the
+# button before the postback starts.
+_FILL_AND_CLICK = """
+const fields = arguments[0], button = document.getElementById(arguments[1]);
+for (const [id, value] of Object.entries(fields)) {
+    const field = document.getElementById(id);
+    if (!field) { return 'missing:' + id; }
+    field.value = value;
+    field.dispatchEvent(new Event('input', {bubbles: true}));
+}
+if (arguments[2]) {
+    const checkbox = document.getElementById(arguments[2]);
+    if (!checkbox) { return 'missing:' + arguments[2]; }
+    if (!checkbox.checked) { setTimeout(() => checkbox.click(), 0); }
+}
+if (button) { setTimeout(() => button.click(), 0); }
+return button;
+"""
+
+# Click the delete button once it is enabled and visible; false keeps the wait polling.
+# The marker stays on the old page only, so the post-delete page is told apart from it.
+_CLICK_WHEN_READY = """
+const button = document.getElementById(arguments[0]);
+if (!button || button.disabled || button.offsetParent === null) { return false; }
+window.__automationDeleting = true;
+setTimeout(() => button.click(), 0);
+return true;
+"""
+
+# 'blank' for a fresh search form, 'dirty' for anything else, null while the delete postback is still loading
+_FORM_STATE = """
+if (window.__automationDeleting) { return null; }
+if (document.readyState === 'loading') { return null; }
+if (location.href.toLowerCase().indexOf('slogin.aspx') >= 0 || document.getElementById(arguments[1])) {
+    return 'dirty';
+}
+return arguments[0].every(id => { const field = document.getElementById(id); return field && !field.value; })
+    ? 'blank' : 'dirty';
+"""
+
+# Once the delete postback replaced the page: ['expired'|'rejected'|'removed', message label text]
+_DELETE_OUTCOME = """
+if (window.__automationDeleting || document.readyState === 'loading') { return null; }
+if (location.href.toLowerCase().indexOf('slogin.aspx') >= 0) { return ['expired', '']; }
+const label = document.getElementById(arguments[2]);
+const message = label ? label.innerText.trim() : '';
+const rejected = document.getElementById(arguments[0]) || !document.getElementById(arguments[1]);
+return [rejected ? 'rejected' : 'removed', message];
+"""
+
+def delete_outcome():
+    """Wait condition after btnDelete: ("removed" | "rejected" | "expired", message) once the postback is done
+
+    Returns False while the page we clicked from is still showing, so
+    nothing navigates away before the portal has answered the delete. An
+    alert's text is kept as the message if the page label is empty.
+    """
+    alerts = []
+
+    def check(driver):
+        try:
+            alert = driver.switch_to.alert
+            alerts.append(alert.text)
+            alert.accept()
+            return False
+        except NoAlertPresentException:
+            pass
+        try:
+            result = driver.execute_script(_DELETE_OUTCOME, CONFIRM_ORIGINAL_ID, DUP_ID, MESSAGE_LABEL_ID)
+        except WebDriverException:
+            # Mid-navigation or an alert just opened: poll again
+            return False
+        if not result:
+            return False
+        outcome, message = result
+        return outcome, message or (alerts[-1] if alerts else "")
+    return check
+
+def lookup_outcome(show_button):
+    """Wait condition after BtnShow: the confirm field, or the portal's 'not found' answer
+
+    Returns ("found", element) or ("not_found", message), or False to keep
+    polling. Page text is only read once the postback replaced the page, so
+    the form we clicked from is never mistaken for the answer.
+    """
+    def check(driver):
+        try:
+            alert = driver.switch_to.alert
+            message = alert.text
+            alert.accept()
+            return "not_found", message or "Portal rejected the lookup"
+        except NoAlertPresentException:
+            pass
+
+        found = driver.find_elements(By.ID, CONFIRM_ORIGINAL_ID)
+        if found:
+            return "found", found[0]
+
+        try:
+            show_button.is_enabled()
+            return False
+        except StaleElementReferenceException:
+            message = not_found_message(driver.execute_script("return document.body ? document.body.innerText : ''"))
+            return ("not_found", message) if message else False
+    return check
+
+class RemoveMemberPage:
+    """Page object for Remove_Member.aspx
+
+    Each form stage is a single ``execute_script`` round-trip: the three ID
+    fields plus BtnShow, then confirm original, remark and checkbox, then
+    btnDelete as soon as the portal enables it, whose answer is then
+    waited for.
+    """
+
+    def __init__(self, driver, url):
+        self.driver = driver
+        self.url = url
+
+    def open(self, timeout):
+        """Load the blank form and wait for the ID fields"""
+        self.driver.get(self.url)
+        WebDriverWait(self.driver, timeout).until(EC.presence_of_element_located((By.ID, DUP_ID)))
+
+    def blank_form_ready(self, timeout):
+        """True when the current page is a blank search form to start the next member from"""
+        try:
+            state = WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                lambda driver: driver.execute_script(_FORM_STATE, [DUP_ID, CONFIRM_ID, ORIGINAL_ID], CONFIRM_ORIGINAL_ID))
+        except WebDriverException:
+            # Timed out, or the page is mid-navigation or showing an alert: treat as unknown
+            return False
+        return state == "blank"
+
+    def search(self, dup, conf, orig):
+        """Fill the three ID fields and press BtnShow; returns the button to watch for staleness"""
+        result = self.driver.execute_script(
+            _FILL_AND_CLICK, {DUP_ID: dup, CONFIRM_ID: conf, ORIGINAL_ID: orig}, SHOW_BUTTON_ID, None)
+        return self._element(result, SHOW_BUTTON_ID)
+
+    def wait_for_lookup(self, show_button, timeout):
+        """("found", confirm field) or ("not_found", message); raises TimeoutException"""
+        return WebDriverWait(self.driver, timeout, poll_frequency=0.2).until(lookup_outcome(show_button))
+
+    def confirm(self, orig, remark=REMOVE_REMARK):
+        """Fill confirm original and the remark, and tick the confirmation checkbox"""
+        result = self.driver.execute_script(
+            _FILL_AND_CLICK, {CONFIRM_ORIGINAL_ID: orig, REMARK_ID: remark}, None, CONFIRM_CHECKBOX_ID)
+        if isinstance(result, str):
+            self._element(result, CONFIRM_CHECKBOX_ID)
+
+    def delete(self, timeout):
+        """Click btnDelete as soon as it is clickable; raises TimeoutException"""
+        WebDriverWait(self.driver, timeout, poll_frequency=0.2).until(
+            lambda driver: driver.execute_script(_CLICK_WHEN_READY, DELETE_BUTTON_ID))
+
+    def wait_for_delete(self, timeout):
+        """("removed" | "rejected" | "expired", message) once the delete postback is done; raises TimeoutException"""
+        return WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(delete_outcome())
+
+    @staticmethod
+    def _element(result, element_id):
+        if isinstance(result, str) and result.startswith("missing:"):
+            raise Exception(f"no such element: Unable to locate element with id {result[len('missing:'):]}")
+        if result is None:
+            raise Exception(f"no such element: Unable to locate element with id {element_id}")
+        return result
\ No newline at end of file
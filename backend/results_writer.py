@@ -0,0 +1,110 @@
+import csv
+import os
+import shutil
+import threading
+
+import pandas as pd
+
+# Rows buffered in memory before they are appended to the CSV
+WRITE_BATCH = int(os.environ.get("AUTOMATION_WRITE_BATCH", "50"))
+
+# Extra binary copies written when a log is closed, e.g. "parquet" or "parquet,feather" (needs pyarrow)
+EXTRA_FORMATS = tuple(
+    fmt.strip().lower()
+    for fmt in os.environ.get("AUTOMATION_RESULTS_FORMATS", "").split(",")
+    if fmt.strip())
+
+# One schema for success and failure logs; every column is a string
+COLUMNS = ["familyid", "memberid", "status", "error", "error_class", "timestamp", "original_member"]
+DTYPES = {column: "string" for column in COLUMNS}
+
+def read_results(path):
+    """Load a results CSV with the fixed column order and dtypes"""
+    return pd.read_csv(path, dtype=str).reindex(columns=COLUMNS).astype(DTYPES)
+
+class ResultsWriter:
+    """Appends result entries to a CSV in batches as a run produces them
+
+    The file is created (replacing an older one) with the first batch, so a
+    run without rows leaves no file behind. ``on_flush(path)`` is called
+    after every batch written.
+    """
+
+    def __init__(self, path, batch_size=WRITE_BATCH, on_flush=None):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.on_flush = on_flush
+        self.count = 0
+        self._pending = []
+        self._started = False
+        self._lock = threading.Lock()
+
+    def append(self, entry):
+        with self._lock:
+            self._pending.append(entry)
+            self.count += 1
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        with open(self.path, "a" if self._started else "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction="ignore")
+            if not self._started:
+                writer.writeheader()
+            writer.writerows(self._pending)
+        self._started = True
+        self._pending = []
+        if self.on_flush is not None:
+            self.on_flush(self.path)
+
+    def close(self, formats=EXTRA_FORMATS):
+        """Write what is left; return the CSV path, or None when the run had no rows"""
+        self.flush()
+        if not self._started:
+            return None
+        for fmt in formats:
+            write_binary_copy(self.path, fmt)
+        return self.path
+
+def write_binary_copy(path, fmt):
+    """Write ``path`` as Parquet or Feather next to it (skipped with a warning without pyarrow)"""
+    target = os.path.splitext(path)[0] + (".parquet" if fmt == "parquet" else ".feather")
+    try:
+        data = read_results(path)
+        if fmt == "parquet":
+            data.to_parquet(target, index=False)
+        elif fmt == "feather":
+            data.to_feather(target)
+        else:
+            print(f"⚠️ Unknown results format '{fmt}' ignored")
+            return None
+    except ImportError as e:
+        print(f"⚠️ Cannot write {fmt} copy of {path}: {e}")
+        return None
+    return target
+
+def point_latest(path, latest_path):
+    """Make ``latest_path`` refer to ``path``, or remove it when the run wrote no file
+
+    A relative symlink is swapped in atomically; where symlinks are not
+    available the file is copied instead.
+    """
+    if path is None:
+        if os.path.lexists(latest_path):
+            os.remove(latest_path)
+        return
+
+    tmp_path = latest_path + ".tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.symlink(os.path.relpath(path, os.path.dirname(latest_path) or "."), tmp_path)
+    except (OSError, NotImplementedError):
+        shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, latest_path)
\ No newline at end of file
@@ -0,0 +1,53 @@
+import os
+
+# Extra passes over transient failures at the end of a run (0 disables retrying)
+MAX_RETRIES = int(os.environ.get("AUTOMATION_MAX_RETRIES", "2"))
+
+# Seconds before the first retry pass; doubled for every further pass
+RETRY_BACKOFF = float(os.environ.get("AUTOMATION_RETRY_BACKOFF", "5"))
+
+TIMEOUT = "timeout"
+ELEMENT_MISSING = "element_missing"
+SESSION_DEAD = "session_dead"
+SERVER_ERROR = "server_error"
+NOT_FOUND = "not_found"
+UNKNOWN = "error"
+
+# Worth another attempt later; everything else is final on the first failure
+TRANSIENT = (TIMEOUT, ELEMENT_MISSING, SESSION_DEAD, SERVER_ERROR)
+
+_SESSION_DEAD_MARKERS = (
+    "invalid session id", "session deleted", "no such window", "target window already closed",
+    "chrome not reachable", "disconnected", "session expired", "connection refused",
+    "max retries exceeded", "connection aborted",
+)
+# HTTP 5xx answers ("500 Server Error: ...") and the ASP.NET error page
+_SERVER_ERROR_MARKERS = (
+    "server error", "service unavailable", "bad gateway", "gateway timeout",
+)
+_ELEMENT_MISSING_MARKERS = (
+    "no such element", "unable to locate element", "stale element", "not interactable",
+    "not clickable", "not available", "not found in lookup response", "missing __viewstate",
+)
+
+def classify(error):
+    """Failure class of an exception or error message"""
+    text = str(error or "").lower()
+    if any(marker in text for marker in _SESSION_DEAD_MARKERS):
+        return SESSION_DEAD
+    if any(marker in text for marker in _SERVER_ERROR_MARKERS):
+        return SERVER_ERROR
+    if text.startswith("member not found"):
+        return NOT_FOUND
+    if "timeout" in text or "timed out" in text:
+        return TIMEOUT
+    if any(marker in text for marker in _ELEMENT_MISSING_MARKERS):
+        return ELEMENT_MISSING
+    return UNKNOWN
+
+def is_transient(error_class):
+    return error_class in TRANSIENT
+
+def backoff(attempt):
+    """Delay before retry pass ``attempt`` (1-based)"""
+    return RETRY_BACKOFF * 2 ** (attempt - 1)
\ No newline at end of file
@@ -0,0 +1,111 @@
+import os
+import pickle
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+# Seconds between liveness checks of a running job's session...
+CHECK_INTERVAL = float(os.environ.get("AUTOMATION_SESSION_CHECK_INTERVAL", "60"))
+
+# ...and the shorter gap allowed right after a member failed
+FAILURE_CHECK_INTERVAL = float(os.environ.get("AUTOMATION_SESSION_FAILURE_CHECK_INTERVAL", "10"))
+
+# Seconds to wait for the check request itself
+CHECK_TIMEOUT = float(os.environ.get("AUTOMATION_SESSION_CHECK_TIMEOUT", "10"))
+
+# The portal answers a request without a valid session with a redirect to this page
+LOGIN_PAGE_MARKER = "slogin.aspx"
+
+def _cookie_path(cookie_name):
+    return f"cookies/{cookie_name}.pkl"
+
+def bind_saved_cookies(session, cookie_name, url):
+    """Load the saved cookies of ``cookie_name`` into a requests session; return them as saved"""
+    with open(_cookie_path(cookie_name), "rb") as f:
+        saved = pickle.load(f)
+    # Selenium cookies are scoped to the portal host; rebind them to the host of ``url``
+    host = urlparse(url).hostname
+    for cookie in saved:
+        session.cookies.set(cookie["name"], cookie["value"], domain=host, path=cookie.get("path", "/"))
+    return saved
+
+def _probe(session, url):
+    """``(alive, reason)`` for one load of ``url``: False only for a bounce to the login page"""
+    response = session.get(url, timeout=CHECK_TIMEOUT)
+    if LOGIN_PAGE_MARKER in response.url.lower():
+        return False, "Portal redirected to the login page"
+    if not response.ok:
+        # A server error says nothing about the session
+        return None, f"Portal answered HTTP {response.status_code}"
+    return True, None
+
+def check_cookie(cookie_name, url):
+    """Load ``url`` with the saved cookies; return ``(alive, reason)``
+
+    ``alive`` is True or False, or None when the portal could not be reached
+    or answered with an error (which says nothing about the session). A
+    login redirect is confirmed with a second request so one stray
+    redirect does not count as expiry.
+    Cookies the portal renews in the response are written back to the file.
+    """
+    cookie_path = _cookie_path(cookie_name)
+    if not os.path.exists(cookie_path):
+        return False, "Cookie file not found"
+
+    with requests.Session() as session:
+        saved = bind_saved_cookies(session, cookie_name, url)
+        try:
+            alive, reason = _probe(session, url)
+            if alive is False:
+                alive, reason = _probe(session, url)
+        except requests.RequestException as e:
+            return None, f"Portal unreachable: {e}"
+        if not alive:
+            return alive, reason
+
+        renewed = {cookie.name: cookie.value for cookie in session.cookies}
+
+    if any(renewed.get(cookie["name"], cookie["value"]) != cookie["value"] for cookie in saved):
+        for cookie in saved:
+            cookie["value"] = renewed.get(cookie["name"], cookie["value"])
+        tmp_path = cookie_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(saved, f)
+        os.replace(tmp_path, cookie_path)
+    return True, None
+
+class SessionMonitor:
+    """Rate-limited liveness checks of one saved session, shared by a run's workers"""
+
+    def __init__(self, cookie_name, url, interval=CHECK_INTERVAL):
+        self.cookie_name = cookie_name
+        self.url = url
+        self.interval = interval
+        self.expired = False
+        self.reason = None
+        self._last_check = None
+        self._lock = threading.Lock()
+
+    def check(self):
+        """Check now; return False once the session is known to be expired"""
+        with self._lock:
+            self._last_check = time.monotonic()
+        alive, reason = check_cookie(self.cookie_name, self.url)
+        if alive is False:
+            self.expired = True
+            self.reason = reason
+        return not self.expired
+
+    def poll(self, after_failure=False, force=False):
+        """Check if one is due (sooner after a failure, at once with ``force``); return False once the session expired"""
+        with self._lock:
+            if self.expired:
+                return False
+            gap = FAILURE_CHECK_INTERVAL if after_failure else self.interval
+            if not force and self._last_check is not None and time.monotonic() - self._last_check < gap:
+                return True
+            # Claim the check so concurrent workers don't all send one
+            self._last_check = time.monotonic()
+        return self.check()
\ No newline at end of file
@@ -0,0 +1,272 @@
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+# Console records kept per task; older records are dropped first
+LOG_BUFFER_SIZE = int(os.environ.get("AUTOMATION_LOG_BUFFER", "2000"))
+
+# Finished tasks are forgotten after this many seconds...
+TASK_TTL = float(os.environ.get("AUTOMATION_TASK_TTL", "3600"))
+
+# ...and beyond this many finished tasks, least recently viewed first
+MAX_FINISHED_TASKS = int(os.environ.get("AUTOMATION_MAX_FINISHED_TASKS", "50"))
+
+# Seconds between progress snapshots; worker updates in between are coalesced
+PROGRESS_INTERVAL = float(os.environ.get("AUTOMATION_PROGRESS_INTERVAL", "0.25"))
+
+# Echo step messages to stdout (written in batches by the aggregator thread)
+PROGRESS_STDOUT = os.environ.get("AUTOMATION_PROGRESS_STDOUT", "1") != "0"
+
+FINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+LogRecord = namedtuple('LogRecord', 'seq ts level step member family message')
+
+# Global variable to store running tasks for progress updates
+running_tasks = {}
+
+_finished_at = {}
+_last_access = {}
+_tasks_lock = threading.RLock()
+
+# Progress events from worker threads, applied in batches by the aggregator
+ProgressEvent = namedtuple('ProgressEvent', 'task_id progress member family message step ts')
+_events = queue.SimpleQueue()
+_apply_lock = threading.Lock()
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+# Bumped on every task change so stream listeners can wait instead of polling
+task_updates = threading.Condition()
+task_version = [0]
+
+def classify_level(message):
+    """Map the emoji prefix convention of step messages to a log level"""
+    if '❌' in message:
+        return 'error'
+    if '⚠️' in message:
+        return 'warning'
+    if '✅' in message or '🎉' in message:
+        return 'success'
+    return 'info'
+
+class TaskLog:
+    """Bounded ring buffer of structured console records with sequence numbers"""
+
+    def __init__(self, maxlen=LOG_BUFFER_SIZE):
+        self._records = deque(maxlen=maxlen)
+        self._next_seq = 0
+        self._lock = threading.Lock()
+
+    def append(self, message, level=None, step=None, member=None, family=None, ts=None):
+        with self._lock:
+            record = LogRecord(self._next_seq, round(ts or time.time(), 3), level or classify_level(message),
+                               step, member, family, message)
+            self._records.append(record)
+            self._next_seq += 1
+            return record
+
+    def since(self, cursor=0):
+        """Records with ``seq >= cursor``, the next cursor, and how many were already dropped"""
+        with self._lock:
+            records = list(self._records)
+            next_seq = self._next_seq
+        oldest = records[0].seq if records else next_seq
+        dropped = max(0, oldest - cursor)
+        start = max(0, cursor - oldest)
+        return records[start:], next_seq, dropped
+
+    def messages(self):
+        with self._lock:
+            return [record.message for record in self._records]
+
+    def __len__(self):
+        return len(self._records)
+
+def notify_task_update():
+    """Wake every listener waiting in wait_for_task_update"""
+    with task_updates:
+        task_version[0] += 1
+        task_updates.notify_all()
+
+def wait_for_task_update(seen_version, timeout):
+    """Block until a task changes after ``seen_version`` (or timeout); return the new version"""
+    with task_updates:
+        task_updates.wait_for(lambda: task_version[0] != seen_version, timeout)
+        return task_version[0]
+
+def register_task(task_id, status, progress=0, logs=(), **fields):
+    """Create the progress entry for a new task"""
+    evict_finished_tasks()
+    console = TaskLog()
+    for message in logs:
+        console.append(message)
+    with _tasks_lock:
+        running_tasks[task_id] = {
+            'status': status,
+            'start_time': datetime.now().isoformat(),
+            'progress': progress,
+            'console_logs': console,
+            **fields
+        }
+        _last_access[task_id] = time.time()
+    notify_task_update()
+
+def _replace(task_id, **fields):
+    """Publish a new snapshot of a task; readers never see a half-applied update"""
+    with _tasks_lock:
+        task = running_tasks.get(task_id)
+        if task is None:
+            return None
+        task = {**task, **fields}
+        running_tasks[task_id] = task
+        return task
+
+def log_task_message(task_id, message, level=None, step=None, member=None, family=None):
+    flush_progress()
+    task = running_tasks.get(task_id)
+    if task is not None:
+        task['console_logs'].append(message, level, step, member, family)
+        notify_task_update()
+
+def update_task(task_id, **fields):
+    """Set plain status fields on a task and wake listeners"""
+    flush_progress()
+    if _replace(task_id, **fields) is not None:
+        notify_task_update()
+
+def finish_task(task_id, status, logs=(), **fields):
+    """Mark a task completed/failed; it becomes eligible for eviction"""
+    flush_progress()
+    task = running_tasks.get(task_id)
+    if task is None:
+        return
+    for message in logs:
+        task['console_logs'].append(message)
+    _replace(task_id, **fields, status=status, end_time=datetime.now().isoformat())
+    with _tasks_lock:
+        _finished_at[task_id] = time.time()
+    notify_task_update()
+
+def update_task_progress(task_id, progress, current_member=None, current_family=None, step_message=None, step=None):
+    """Queue a progress update with detailed step information
+
+    Called from worker threads many times per member, so it only enqueues;
+    the aggregator thread applies queued updates every PROGRESS_INTERVAL.
+    """
+    if task_id is None:
+        return
+    _events.put(ProgressEvent(task_id, progress, current_member, current_family, step_message, step, time.time()))
+    if _aggregator is None:
+        _start_aggregator()
+
+def _start_aggregator():
+    global _aggregator
+    with _aggregator_lock:
+        if _aggregator is None:
+            _aggregator = threading.Thread(target=_aggregate, daemon=True)
+            _aggregator.start()
+
+def _aggregate():
+    while True:
+        time.sleep(PROGRESS_INTERVAL)
+        flush_progress()
+
+def flush_progress():
+    """Apply every queued progress event now; returns how many were applied"""
+    with _apply_lock:
+        events = []
+        while True:
+            try:
+                events.append(_events.get_nowait())
+            except queue.Empty:
+                break
+        if not events:
+            return 0
+
+        # Messages are kept in order; progress and current member only need the latest value
+        changes = {}
+        echo = []
+        for event in events:
+            task = running_tasks.get(event.task_id)
+            if task is None:
+                continue
+            latest = changes.setdefault(event.task_id, {})
+            latest['progress'] = event.progress
+            if event.member:
+                latest['current_member'] = event.member
+            if event.family:
+                latest['current_family'] = event.family
+            if event.message:
+                task['console_logs'].append(event.message, step=event.step, member=event.member,
+                                            family=event.family, ts=event.ts)
+                parent = running_tasks.get(task.get('parent_id')) if task.get('parent_id') else None
+                if parent is not None:
+                    parent['console_logs'].append(f"[{task.get('shard')}] {event.message}", step=event.step,
+                                                  member=event.member, family=event.family, ts=event.ts)
+                echo.append(f"📝 {event.message}")
+
+        for task_id, fields in changes.items():
+            task = _replace(task_id, **fields)
+            if task is not None and task.get('parent_id'):
+                _roll_up(task)
+
+        if echo and PROGRESS_STDOUT:
+            sys.stdout.write("\n".join(echo) + "\n")
+            sys.stdout.flush()
+    notify_task_update()
+    return len(events)
+
+def _roll_up(task):
+    """Reflect a sub-job's progress in its parent task: mean progress and current member"""
+    parent = running_tasks.get(task['parent_id'])
+    if parent is None:
+        return
+    shards = [running_tasks.get(shard_id) for shard_id in parent.get('shards') or ()]
+    fields = {key: task[key] for key in ('current_member', 'current_family') if task.get(key)}
+    if shards:
+        fields['progress'] = sum(shard['progress'] if shard else 0 for shard in shards) / len(shards)
+    _replace(task['parent_id'], **fields)
+
+def task_state(task_id, cursor=None):
+    """JSON-ready view of a task.
+
+    Without ``cursor`` the buffered console lines are returned as plain
+    strings, as before. With ``cursor`` only the structured records after it
+    are returned, with ``log_cursor`` to pass on the next call. Task entries
+    are replaced rather than mutated, so the fields always come from one
+    snapshot.
+    """
+    task = running_tasks.get(task_id)
+    if task is None:
+        return None
+    with _tasks_lock:
+        _last_access[task_id] = time.time()
+
+    console = task['console_logs']
+    state = {key: value for key, value in list(task.items()) if key != 'console_logs'}
+    if cursor is None:
+        state['console_logs'] = console.messages()
+    else:
+        records, next_cursor, dropped = console.since(cursor)
+        state['log_records'] = [record._asdict() for record in records]
+        state['log_cursor'] = next_cursor
+        state['log_dropped'] = dropped
+    return state
+
+def evict_finished_tasks(now=None):
+    """Drop finished tasks past their TTL, then the least recently viewed beyond the cap"""
+    now = now or time.time()
+    with _tasks_lock:
+        expired = [task_id for task_id, finished in _finished_at.items() if now - finished > TASK_TTL]
+        remaining = sorted((task_id for task_id in _finished_at if task_id not in expired),
+                           key=lambda task_id: _last_access.get(task_id, 0))
+        expired += remaining[:max(0, len(remaining) - MAX_FINISHED_TASKS)]
+        for task_id in expired:
+            running_tasks.pop(task_id, None)
+            _finished_at.pop(task_id, None)
+            _last_access.pop(task_id, None)
+    return len(expired)
@@ -7,36 +7,22 @@ import pandas as pd
 import time
 import pickle
 import os
-
-# Load data
-data = pd.read_csv("Pending E-kyc.csv")
-data.columns = [col.strip().lower() for col in data.columns]
+import dataset
+import planner
 
 # Set row range
 start_row = 9404
 end_row = 9470
-range_df = data.iloc[start_row:end_row].copy()
-
-if "memberid" not in range_df.columns or "familyid" not in range_df.columns:
-    raise ValueError("Missing 'memberid' or 'familyid' column")
 
-# Group members by FamilyID
-family_groups = range_df.groupby('familyid')['memberid'].apply(list).to_dict()
-print(f"🔍 Found {len(family_groups)} families with members.")
+# Parse only the requested rows and pair the members of each family within them
+window_plan = planner.build_plan(dataset.read_window(start_row, end_row))
+print(f"🔍 Found {window_plan['familyid'].nunique()} families with members.")
 
 # Prepare task list: list of (duplicate, confirm, original)
 tasks = []
-for fam_id, members in family_groups.items():
-    for i in range(len(members)):
-        duplicate = confirm = str(members[i])
-        if i < len(members) - 1:
-            original = str(members[i + 1])
-        elif i > 0:
-            original = str(members[i - 1])
-        else:
-            continue  # Skip if only one member in family
-        tasks.append((duplicate, confirm, original, fam_id))
-        print(f"🔍 Task added for FamilyID={fam_id}: Duplicate={duplicate}, Original={original}")
+for fam_id, duplicate, original in window_plan[["familyid", "duplicate", "original"]].itertuples(index=False):
+    tasks.append((duplicate, duplicate, original, fam_id))
+    print(f"🔍 Task added for FamilyID={fam_id}: Duplicate={duplicate}, Original={original}")
 
 # Setup Chrome
 options = Options()
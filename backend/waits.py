@@ -0,0 +1,84 @@
+import os
+import re
+import threading
+from collections import deque
+from html import unescape
+
+# Bounds for any adaptive timeout, in seconds
+MIN_TIMEOUT = float(os.environ.get("AUTOMATION_WAIT_MIN", "3"))
+MAX_TIMEOUT = float(os.environ.get("AUTOMATION_WAIT_MAX", "15"))
+
+# Timeout = p95 of recent latencies times this factor, once enough samples exist
+TIMEOUT_FACTOR = float(os.environ.get("AUTOMATION_WAIT_FACTOR", "3"))
+MIN_SAMPLES = 10
+LATENCY_WINDOW = 200
+
+# Phrases the portal uses when a lookup has no member to remove (case-insensitive)
+NOT_FOUND_MARKERS = tuple(
+    marker.strip().lower()
+    for marker in os.environ.get(
+        "AUTOMATION_NOT_FOUND_MARKERS",
+        "record not found,not found,no record,does not exist,invalid samagra").split(",")
+    if marker.strip())
+
+class StepLatency:
+    """Recent latencies per step, used to size waits from what the portal actually does"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def observe(self, step, seconds):
+        with self._lock:
+            self._samples.setdefault(step, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, step, q):
+        with self._lock:
+            samples = sorted(self._samples.get(step, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def timeout(self, step):
+        """Seconds to wait for ``step``; the maximum until enough samples are in"""
+        with self._lock:
+            count = len(self._samples.get(step, ()))
+        if count < MIN_SAMPLES:
+            return MAX_TIMEOUT
+        return max(MIN_TIMEOUT, min(MAX_TIMEOUT, self.percentile(step, 0.95) * TIMEOUT_FACTOR))
+
+    def snapshot(self):
+        with self._lock:
+            steps = list(self._samples)
+        return {
+            step: {
+                'count': len(self._samples[step]),
+                'p50': round(self.percentile(step, 0.5), 3),
+                'p95': round(self.percentile(step, 0.95), 3),
+                'timeout': round(self.timeout(step), 1)
+            }
+            for step in steps
+        }
+
+# Shared by every worker so a slow portal stretches all waits together
+step_latency = StepLatency()
+
+def not_found_message(text):
+    """The first line of ``text`` (plain or HTML) carrying a 'member not found' marker"""
+    if not text:
+        return None
+    if "<" in text:
+        text = unescape(re.sub(r"<(script|style)\b.*?</\1>|<[^>]+>", "\n", text, flags=re.S | re.I))
+    for line in text.splitlines():
+        line = line.strip()
+        if line and any(marker in line.lower() for marker in NOT_FOUND_MARKERS):
+            return line
+    return None
+
+def label_text(html, element_id):
+    """Plain text of the element with ``element_id`` in ``html``, or None when it is missing or empty"""
+    match = re.search(rf'<(\w+)[^>]*\bid="{re.escape(element_id)}"[^>]*>(.*?)</\1>', html or "", flags=re.S | re.I)
+    if not match:
+        return None
+    return unescape(re.sub(r"<[^>]+>", " ", match.group(2))).strip() or None
\ No newline at end of file
@@ -13,11 +13,33 @@ interface TaskStatus {
     success_file: string;
     fail_file: string;
     total_processed: number;
+    skipped_count?: number;
+    workers?: number;
+    engine?: string;
   };
   error?: string;
   console_logs?: string[];
   current_member?: string;
   current_family?: string;
+  reauth_required?: boolean;
+  pace?: {
+    adaptive: boolean;
+    workers: number;
+    max_workers: number;
+    delay: number;
+    latency: number | null;
+    error_rate: number | null;
+  };
+}
+
+interface LogRecord {
+  seq: number;
+  ts: number;
+  level: 'info' | 'success' | 'error' | 'warning';
+  step: string | null;
+  member: string | null;
+  family: string | null;
+  message: string;
 }
 
 interface LogFile {
@@ -41,6 +63,9 @@ interface ConsoleLog {
 function App() {
   const [startRow, setStartRow] = useState<number>(0);
   const [endRow, setEndRow] = useState<number>(100);
+  const [workers, setWorkers] = useState<number>(1);
+  const [engine, setEngine] = useState<'browser' | 'http'>('browser');
+  const [resume, setResume] = useState<boolean>(false);
   const [cookieName, setCookieName] = useState<string>('');
   const [isRunning, setIsRunning] = useState<boolean>(false);
   const [taskId, setTaskId] = useState<string>('');
@@ -67,60 +92,110 @@ function App() {
     }
   }, [consoleLogs]);
 
+  const getLogType = (logMessage: string): 'info' | 'success' | 'error' | 'warning' => {
+    // Determine log type based on message content
+    if (logMessage.includes('✅') || logMessage.includes('🎉')) {
+      return 'success';
+    } else if (logMessage.includes('❌') || logMessage.includes('⚠️')) {
+      return 'error';
+    } else if (logMessage.includes('🔍') || logMessage.includes('📝')) {
+      return 'warning';
+    }
+    return 'info';
+  };
+
   useEffect(() => {
-    let interval: NodeJS.Timeout;
-    if (isRunning && taskId) {
+    if (!isRunning || !taskId) return;
+
+    let cursor = 0;
+    let lastMember: string | undefined;
+    let finished = false;
+    let reauthPrompted = false;
+    let current: TaskStatus = { status: 'running' };
+    let source: EventSource | null = null;
+    let interval: ReturnType<typeof setInterval> | null = null;
+
+    // Merge an incremental update: new log lines plus changed status fields
+    const applyUpdate = (records: LogRecord[], dropped: number, changes: Partial<TaskStatus>) => {
+      if (dropped > 0) {
+        addConsoleLog('warning', `⚠️ ${dropped} older console lines were dropped from the server buffer`);
+      }
+      records.forEach((record) => addConsoleLog(getLogType(record.message), record.message));
+
+      current = { ...current, ...changes };
+      setTaskStatus(current);
+      
+      // Add current processing info
+      if (current.current_member && current.current_family && current.current_member !== lastMember) {
+        lastMember = current.current_member;
+        addConsoleLog('info', `🔄 Processing Member ID: ${current.current_member} | Family ID: ${current.current_family}`);
+      }
+      
+      // The job paused on an expired session: ask for a fresh login, which resumes it
+      if (current.reauth_required && !reauthPrompted) {
+        reauthPrompted = true;
+        addConsoleLog('warning', '🔐 Session expired. Log in again to resume the paused job.');
+        setLoginParams({ start_row: startRow, end_row: endRow, cookie_name: cookieName.trim(), workers, engine, resume });
+        setShowLoginModal(true);
+      } else if (!current.reauth_required) {
+        reauthPrompted = false;
+      }
+
+      if (!finished && current.status === 'completed') {
+        finished = true;
+        setIsRunning(false);
+        addConsoleLog('success', `🎉 Automation completed successfully! Processed ${current.result?.total_processed || 0} members.`);
+        addConsoleLog('success', `📊 Success: ${current.result?.success_count || 0} | Failed: ${current.result?.fail_count || 0}`);
+        fetchLogs();
+      } else if (!finished && current.status === 'failed') {
+        finished = true;
+        setIsRunning(false);
+        addConsoleLog('error', `❌ Automation failed: ${current.error}`);
+      } else if (!finished && current.status === 'cancelled') {
+        finished = true;
+        setIsRunning(false);
+        addConsoleLog('warning', '⏹️ Automation cancelled');
+        fetchLogs();
+      }
+    };
+
+    // Fallback when the browser or a proxy cannot hold the stream open
+    const startPolling = () => {
       interval = setInterval(async () => {
         try {
-          const response = await axios.get(`${API_BASE}/task_status/${taskId}`);
-          setTaskStatus(response.data);
-          
-          // Add new console logs from backend
-          if (response.data.console_logs && Array.isArray(response.data.console_logs)) {
-            const newLogs = response.data.console_logs.slice(consoleLogs.length);
-            newLogs.forEach((logMessage: string) => {
-              // Determine log type based on message content
-              let logType: 'info' | 'success' | 'error' | 'warning' = 'info';
-              if (logMessage.includes('✅') || logMessage.includes('🎉')) {
-                logType = 'success';
-              } else if (logMessage.includes('❌') || logMessage.includes('⚠️')) {
-                logType = 'error';
-              } else if (logMessage.includes('🔍') || logMessage.includes('📝')) {
-                logType = 'warning';
-              }
-              
-              addConsoleLog(logType, logMessage);
-            });
-          }
-          
-          // Add current processing info
-          if (response.data.current_member && response.data.current_family) {
-            const currentInfo = `Processing Member ID: ${response.data.current_member} | Family ID: ${response.data.current_family}`;
-            if (!consoleLogs.some(log => log.message.includes(currentInfo))) {
-              addConsoleLog('info', `🔄 ${currentInfo}`);
-            }
-          }
-          
-          if (response.data.status === 'completed') {
-            setIsRunning(false);
-            addConsoleLog('success', `🎉 Automation completed successfully! Processed ${response.data.result?.total_processed || 0} members.`);
-            addConsoleLog('success', `📊 Success: ${response.data.result?.success_count || 0} | Failed: ${response.data.result?.fail_count || 0}`);
-            fetchLogs();
-          } else if (response.data.status === 'failed') {
-            setIsRunning(false);
-            addConsoleLog('error', `❌ Automation failed: ${response.data.error}`);
-          }
+          const response = await axios.get(`${API_BASE}/task_status/${taskId}`, { params: { cursor } });
+          const { log_records: records = [], log_cursor, log_dropped, ...changes } = response.data;
+          cursor = log_cursor ?? cursor;
+          applyUpdate(records, log_dropped || 0, changes);
+          if (finished && interval) clearInterval(interval);
         } catch (error) {
           console.error('Error fetching task status:', error);
           addConsoleLog('error', '❌ Failed to fetch task status');
         }
-      }, 1000); // Check every second for more responsive updates
+      }, 1000);
+    };
+
+    if (typeof EventSource !== 'undefined') {
+      source = new EventSource(`${API_BASE}/task_stream/${taskId}`);
+      source.addEventListener('progress', (event) => {
+        const data = JSON.parse((event as MessageEvent).data);
+        cursor = data.cursor;
+        applyUpdate(data.records, data.dropped, data.changes);
+      });
+      source.addEventListener('end', () => source?.close());
+      source.onerror = () => {
+        source?.close();
+        if (!finished) startPolling();
+      };
+    } else {
+      startPolling();
     }
     
     return () => {
+      source?.close();
       if (interval) clearInterval(interval);
     };
-  }, [isRunning, taskId, consoleLogs.length]);
+  }, [isRunning, taskId]);
 
   const addConsoleLog = (type: 'info' | 'success' | 'error' | 'warning', message: string) => {
     const newLog: ConsoleLog = {
@@ -167,20 +242,23 @@ function App() {
       setIsRunning(true);
       setConsoleLogs([]); // Clear previous logs
       addConsoleLog('info', `🚀 Initiating automation for session: ${cookieName}`);
-      addConsoleLog('info', `📊 Processing rows ${startRow} to ${endRow}`);
+      addConsoleLog('info', `📊 Processing rows ${startRow} to ${endRow} with ${workers} worker(s)`);
       
       const response = await axios.post(`${API_BASE}/run`, {
         start_row: startRow,
         end_row: endRow,
-        cookie_name: cookieName.trim()
+        cookie_name: cookieName.trim(),
+        workers,
+        engine,
+        resume
       });
 
       if (response.data.status === 'started') {
         setTaskId(response.data.task_id);
-        setTaskStatus({ status: 'running', progress: 0 });
-        addConsoleLog('success', '✅ Automation task started successfully');
+        setTaskStatus({ status: response.data.job_status, progress: 0 });
+        addConsoleLog('success', `✅ ${response.data.message}`);
       } else if (response.data.status === 'login_required') {
-        setLoginParams({ start_row: startRow, end_row: endRow, cookie_name: cookieName.trim() });
+        setLoginParams({ start_row: startRow, end_row: endRow, cookie_name: response.data.cookie_name ?? cookieName.trim(), workers, engine, resume });
         setShowLoginModal(true);
         setIsRunning(false);
         addConsoleLog('warning', '⚠️ Session not found. Manual login required.');
@@ -188,7 +266,11 @@ function App() {
     } catch (error) {
       console.error('Error starting automation:', error);
       setIsRunning(false);
-      addConsoleLog('error', '❌ Failed to start automation task');
+      if (axios.isAxiosError(error) && (error.response?.status === 409 || error.response?.status === 400)) {
+        addConsoleLog('error', `❌ ${error.response.data.message}`);
+      } else {
+        addConsoleLog('error', '❌ Failed to start automation task');
+      }
     }
   };
 
@@ -224,7 +306,11 @@ function App() {
     } catch (error) {
       console.error('Error saving cookies:', error);
       setIsRunning(false);
-      addConsoleLog('error', '❌ Failed to save session and start automation');
+      if (axios.isAxiosError(error) && error.response?.status === 409) {
+        addConsoleLog('error', `❌ ${error.response.data.message}`);
+      } else {
+        addConsoleLog('error', '❌ Failed to save session and start automation');
+      }
     }
   };
 
@@ -259,6 +345,9 @@ function App() {
         return <CheckCircle className="w-5 h-5 text-green-400" />;
       case 'failed':
         return <XCircle className="w-5 h-5 text-red-400" />;
+      case 'cancelled':
+      case 'paused':
+        return <AlertCircle className="w-5 h-5 text-yellow-400" />;
       default:
         return <Clock className="w-5 h-5 text-gray-400" />;
     }
@@ -377,13 +466,28 @@ function App() {
                       type="text"
                       value={cookieName}
                       onChange={(e) => setCookieName(e.target.value)}
-                      placeholder="user1, ward_a, admin_session..."
+                      placeholder="user1, or ward_a,ward_b, or all"
                       className="w-full px-4 py-3 bg-black border border-green-800 rounded-lg focus:ring-2 focus:ring-green-600 focus:border-green-600 text-green-400 placeholder-green-700 font-mono"
                       disabled={isRunning}
                     />
                   </div>
                   
-                  <div className="grid grid-cols-2 gap-6">
+                  <div>
+                    <label className="block text-sm font-medium text-green-400 mb-2 tracking-wide">
+                      REMOVAL ENGINE
+                    </label>
+                    <select
+                      value={engine}
+                      onChange={(e) => setEngine(e.target.value as 'browser' | 'http')}
+                      className="w-full px-4 py-3 bg-black border border-green-800 rounded-lg focus:ring-2 focus:ring-green-600 focus:border-green-600 text-green-400 font-mono"
+                      disabled={isRunning}
+                    >
+                      <option value="browser">CHROME BROWSER</option>
+                      <option value="http">HTTP POSTBACK (NO BROWSER)</option>
+                    </select>
+                  </div>
+                  
+                  <div className="grid grid-cols-3 gap-6">
                     <div>
                       <label className="block text-sm font-medium text-green-400 mb-2 tracking-wide">
                         START ROW INDEX
@@ -409,8 +513,33 @@ function App() {
                         disabled={isRunning}
                       />
                     </div>
+                    
+                    <div>
+                      <label className="block text-sm font-medium text-green-400 mb-2 tracking-wide">
+                        PARALLEL WORKERS
+                      </label>
+                      <input
+                        type="number"
+                        min={1}
+                        value={workers}
+                        onChange={(e) => setWorkers(Math.max(parseInt(e.target.value) || 1, 1))}
+                        className="w-full px-4 py-3 bg-black border border-green-800 rounded-lg focus:ring-2 focus:ring-green-600 focus:border-green-600 text-green-400 font-mono"
+                        disabled={isRunning}
+                      />
+                    </div>
                   </div>
                   
+                  <label className="flex items-center space-x-3 text-sm text-green-400 tracking-wide cursor-pointer">
+                    <input
+                      type="checkbox"
+                      checked={resume}
+                      onChange={(e) => setResume(e.target.checked)}
+                      className="w-4 h-4 accent-green-600"
+                      disabled={isRunning}
+                    />
+                    <span>RESUME - SKIP MEMBERS ALREADY RECORDED AS REMOVED</span>
+                  </label>
+                  
                   <button
                     onClick={handleRun}
                     disabled={isRunning}
@@ -481,6 +610,31 @@ function App() {
                       </div>
                     )}
                     
+                    {taskStatus.pace && taskStatus.status === 'running' && (
+                      <div className="bg-black border border-green-800 rounded-lg p-4">
+                        <h3 className="font-medium text-green-400 mb-2 tracking-wide">
+                          PACE {taskStatus.pace.adaptive ? '(ADAPTIVE)' : '(FIXED)'}
+                        </h3>
+                        <div className="grid grid-cols-3 gap-4 text-sm">
+                          <div>
+                            <div className="text-cyan-400">Workers:</div>
+                            <div className="text-green-400 font-mono">{taskStatus.pace.workers}/{taskStatus.pace.max_workers}</div>
+                          </div>
+                          <div>
+                            <div className="text-cyan-400">Delay:</div>
+                            <div className="text-green-400 font-mono">{taskStatus.pace.delay}s</div>
+                          </div>
+                          <div>
+                            <div className="text-cyan-400">Postback:</div>
+                            <div className="text-green-400 font-mono">
+                              {taskStatus.pace.latency === null ? '-' : `${taskStatus.pace.latency}s`}
+                              {taskStatus.pace.error_rate ? ` (${Math.round(taskStatus.pace.error_rate * 100)}% err)` : ''}
+                            </div>
+                          </div>
+                        </div>
+                      </div>
+                    )}
+                    
                     {taskStatus.result && (
                       <div className="bg-black border border-green-800 rounded-lg p-4">
                         <h3 className="font-medium text-green-400 mb-3 tracking-wide">EXECUTION RESULTS</h3>
@@ -665,7 +819,7 @@ function App() {
               AUTHENTICATION REQUIRED
             </h3>
             <p className="text-green-600 mb-6 font-mono">
-              Session "{loginParams?.cookie_name}" not found. Manual authentication required to establish secure connection.
+              Session "{loginParams?.cookie_name}" not found or expired. Manual authentication required to establish secure connection.
             </p>
             <div className="flex space-x-3">
               <button